@@ -0,0 +1,125 @@
+"""
+Retained memory of the scheme catalog: the decoded list of RapidAPI dicts against the columnar SchemeCatalog.
+
+Both sides start from the same JSON payload and are measured with tracemalloc after the intermediate objects
+are dropped. Also times the NAV refresh lookup and a full listing on each layout, and measures the compressed
+response bodies the catalog caches once every listing endpoint has been requested.
+
+    python -m benchmarks.catalog_memory_bench --schemes 40000
+"""
+import argparse
+import asyncio
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from benchmarks.environment import configure_environment
+from benchmarks.synthetic import make_scheme_universe
+
+
+def retained_kb(build) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, round(current / 1024, 1)
+
+
+def timed_ms(run, rounds: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(rounds):
+        run()
+    return round((time.perf_counter() - started_at) * 1000 / rounds, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schemes", type=int, default=40000)
+    parser.add_argument("--lookups", type=int, default=5000, help="scheme codes resolved per lookup round")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    configure_environment()
+    # imported here, these read config which configure_environment() sets up first
+    from src.services.catalog_service import SchemeCatalog
+    from src.services.investment_service import InvestmentService
+    from src.services.search_service import SchemeSearchIndex
+
+    payload = json.dumps(make_scheme_universe(args.schemes)).encode()
+
+    schemes, dict_list_kb = retained_kb(lambda: json.loads(payload))
+    _, dict_index_kb = retained_kb(lambda: SchemeSearchIndex(schemes))
+    schemes_by_code = {scheme["Scheme_Code"]: scheme for scheme in schemes}
+
+    catalog, catalog_kb = retained_kb(lambda: SchemeCatalog(json.loads(payload)))
+
+    codes = random.Random(7).sample(list(schemes_by_code), min(args.lookups, len(schemes_by_code)))
+
+    def dict_lookups():
+        for code in codes:
+            scheme = schemes_by_code[code]
+            scheme["Net_Asset_Value"], scheme["Date"]
+
+    def catalog_lookups():
+        for code in codes:
+            catalog.get_nav(code)
+
+    results = {
+        "benchmark": "catalog_memory",
+        "schemes": args.schemes,
+        "payload_kb": round(len(payload) / 1024, 1),
+        "dict_list": {
+            "records_kb": dict_list_kb,
+            "with_search_index_kb": round(dict_list_kb + dict_index_kb, 1),
+            "nav_lookups_ms": timed_ms(dict_lookups, args.rounds),
+            "full_listing_ms": timed_ms(lambda: list(schemes), args.rounds),
+        },
+        "columnar": {
+            "with_search_index_kb": catalog_kb,
+            "nav_lookups_ms": timed_ms(catalog_lookups, args.rounds),
+            "full_listing_ms": timed_ms(catalog.to_dicts, args.rounds),
+        },
+    }
+
+    def columns_only():
+        # the index holds a row view per scheme, without it only the columns stay alive
+        columnar = SchemeCatalog(json.loads(payload))
+        del columnar.search_index
+        return columnar
+
+    _, results["columnar"]["records_kb"] = retained_kb(columns_only)
+
+    investment_service = InvestmentService()
+
+    # every cached body, requested the way the listing routes request them
+    async def request_listings() -> list:
+        payloads = [
+            await investment_service.get_funds_body(catalog, "Data fetched successfully"),
+            await investment_service.get_open_funds_by_family(catalog, None, "Open funds retrieved successfully"),
+            await investment_service.get_famity_funds_from_RapidAPI(catalog, "Fund families retrieved successfully"),
+        ]
+        for family in catalog.families:
+            payloads.append(
+                await investment_service.get_open_funds_by_family(catalog, family, "Open funds retrieved successfully")
+            )
+        return payloads
+
+    payloads, payloads_kb = retained_kb(lambda: asyncio.run(request_listings()))
+    uncompressed = sum(len(asyncio.run(payload.select(None))[0]) for payload in payloads)
+    payload_stats = catalog.get_payload_stats()
+    results["payload_cache"] = {
+        "bodies": payload_stats["size"],
+        "uncompressed_kb": round(uncompressed / 1024, 1),
+        "held_kb": round(payload_stats["bytes"] / 1024, 1),
+        "retained_kb": payloads_kb,
+    }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""Settings for running the benchmarks without a .env file, applied before any src module reads config."""
+import os
+import tempfile
+
+DEFAULT_DATABASE_URL = f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'mfb_benchmark.db')}"
+STUB_RAPID_API_URL = "http://rapidapi.stub/latest"
+
+
+def configure_environment(database_url: str = None, password_hash_rounds: int = None):
+    if database_url:
+        os.environ["DATABASE_URL"] = database_url
+    if password_hash_rounds:
+        os.environ["PASSWORD_HASH_ROUNDS"] = str(password_hash_rounds)
+
+    os.environ.setdefault("DATABASE_URL", DEFAULT_DATABASE_URL)
+    os.environ.setdefault("RAPID_API_URL", STUB_RAPID_API_URL)
+    os.environ.setdefault("RAPID_API_KEY", "benchmark")
+    os.environ.setdefault("RAPID_API_HOST", "rapidapi.stub")
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-benchmark-secret")
+    os.environ.setdefault("JWT_ALGORITHM", "HS256")
+    os.environ.setdefault("DOMAIN", "localhost:8000")
@@ -0,0 +1,64 @@
+"""
+Local stand-in for the RapidAPI `latest` endpoint.
+
+In process, hand it to the shared HTTP client:
+
+    await start_http_client(transport=httpx.ASGITransport(app=create_rapidapi_stub(40000, latency_ms=150)))
+
+Standalone, with RAPID_API_URL=http://127.0.0.1:9000/latest in the server's environment:
+
+    python -m benchmarks.rapidapi_stub --schemes 40000 --latency-ms 150 --port 9000
+"""
+import argparse
+import asyncio
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks.synthetic import make_scheme_universe
+
+
+def create_rapidapi_stub(schemes: int = 10000, latency_ms: float = 0.0, seed: int = 42, nav_drift: float = 0.0) -> FastAPI:
+    """
+    Serves a synthetic scheme universe, filtered on any record field passed as a query parameter.
+
+    With nav_drift every call scales all NAVs by (1 + nav_drift * calls), so each NAV refresh sees changed schemes.
+    """
+    universe = make_scheme_universe(schemes, seed)
+    stub = FastAPI()
+    stub.state.calls = 0
+
+    @stub.get('/latest')
+    async def latest(request: Request):
+        stub.state.calls += 1
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+        filters = dict(request.query_params)
+        records = [scheme for scheme in universe if all(str(scheme.get(key)) == value for key, value in filters.items())]
+
+        if nav_drift:
+            factor = 1 + nav_drift * stub.state.calls
+            records = [{**scheme, "Net_Asset_Value": round(scheme["Net_Asset_Value"] * factor, 4)} for scheme in records]
+        return JSONResponse(records)
+
+    return stub
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schemes", type=int, default=10000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--nav-drift", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+
+    uvicorn.run(create_rapidapi_stub(args.schemes, args.latency_ms, args.seed, args.nav_drift), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Build time and query latency of the scheme search index.
+
+    python -m benchmarks.search_index_bench --schemes 10000
+"""
+import argparse
+import json
+import statistics
+import time
+
+from benchmarks.stats import percentile
+from benchmarks.synthetic import make_scheme_universe
+from src.services.search_service import SchemeSearchIndex
+
+QUERIES = [
+    "h", "hd", "hdfc", "hdfc mid", "sbi blue", "axis small cap", "nippon india liquid", "icici pru tech",
+    "tax saver direct", "nifty 50 index", "flexi", "quant small", "gilt regular idcw", "kotak arbitrage growth",
+    "fund", "mutual fund", "direct growth",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schemes", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    schemes = make_scheme_universe(args.schemes)
+
+    started_at = time.perf_counter()
+    index = SchemeSearchIndex(schemes)
+    build_ms = (time.perf_counter() - started_at) * 1000
+
+    latencies = {query: [] for query in QUERIES}
+    for _ in range(args.rounds):
+        for query in QUERIES:
+            started_at = time.perf_counter()
+            index.search(query, args.limit)
+            latencies[query].append((time.perf_counter() - started_at) * 1000)
+
+    every_sample = [sample for samples in latencies.values() for sample in samples]
+    print(json.dumps({
+        "benchmark": "search_index",
+        "schemes": args.schemes,
+        "vocabulary": len(index),
+        "build_ms": round(build_ms, 2),
+        "query_ms": {
+            "p50": round(statistics.median(every_sample), 4),
+            "p99": round(percentile(every_sample, 0.99), 4),
+            "max": round(max(every_sample), 4),
+        },
+        "per_query_p50_ms": {query: round(statistics.median(samples), 4) for query, samples in latencies.items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
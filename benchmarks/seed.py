@@ -0,0 +1,126 @@
+"""
+Seeds benchmark users and investments into DATABASE_URL (SQLite or MySQL).
+
+Every user gets the password BENCH_PASSWORD and an equal share of the investments, spread over the synthetic
+scheme universe so (user_id, scheme_code) stays unique. Portfolio summaries are built at the end.
+
+    python -m benchmarks.seed --users 200 --investments 10000 --database-url mysql+aiomysql://...
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from benchmarks.environment import configure_environment
+from benchmarks.synthetic import make_scheme_universe
+from src.models.db_models import Base, Investment, User
+
+BENCH_PASSWORD = "bench-password"
+INSERT_BATCH_SIZE = 1000
+
+
+def bench_email(position: int) -> str:
+    return f"bench-user-{position}@example.com"
+
+
+def make_investment_rows(user_ids: list, investments: int, universe: list, seed: int = 42) -> list:
+    if investments > len(user_ids) * len(universe):
+        raise ValueError("Not enough schemes to give every investment a unique (user_id, scheme_code)")
+
+    rng = random.Random(seed)
+    created_at = datetime.now()
+    rows = []
+    for position in range(investments):
+        # holding n of a user is scheme (n + offset) with a per-user offset, so users hold different schemes
+        user_position, holding = position % len(user_ids), position // len(user_ids)
+        scheme = universe[(holding + user_position * 7919) % len(universe)]
+        units = round(rng.uniform(1, 500), 3)
+        nav = round(scheme["Net_Asset_Value"] * rng.uniform(0.7, 1.1), 4)
+        rows.append({
+            "investment_id": str(uuid.uuid4()),
+            "scheme_name": scheme["Scheme_Name"],
+            "scheme_code": scheme["Scheme_Code"],
+            "units": units,
+            "nav": nav,
+            "date": created_at,
+            "current_value": round(units * nav, 4),
+            "fund_family": scheme["Mutual_Fund_Family"],
+            "user_id": user_ids[user_position],
+            "created_at": created_at,
+            "updated_at": created_at,
+        })
+    return rows
+
+
+async def seed_database(engine, users: int, investments: int, universe: list, reset: bool = True, seed: int = 42) -> dict:
+    # imported here, these read config which the caller sets up first
+    from src.services.portfolio_service import portfolio_summary_service
+    from src.services.utils import generate_password_hash
+
+    started_at = time.perf_counter()
+    async with engine.begin() as connection:
+        if reset:
+            await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+    # one bcrypt hash shared by every user, hashing per user would dominate the seeding time
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    created_at = datetime.now()
+    user_rows = [
+        {"user_id": str(uuid.uuid4()), "email": bench_email(position), "password_hash": password_hash,
+         "is_verified": True, "created_at": created_at, "updated_at": created_at}
+        for position in range(users)
+    ]
+    user_ids = [row["user_id"] for row in user_rows]
+    investment_rows = make_investment_rows(user_ids, investments, universe, seed)
+
+    async with engine.begin() as connection:
+        for table, rows in ((User.__table__, user_rows), (Investment.__table__, investment_rows)):
+            for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                await connection.execute(insert(table), rows[start:start + INSERT_BATCH_SIZE])
+
+    async with sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)() as session:
+        await portfolio_summary_service.rebuild_summaries(user_ids, session)
+        await session.commit()
+
+    return {
+        "users": users,
+        "investments": investments,
+        "seed_ms": round((time.perf_counter() - started_at) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--investments", type=int, default=10000)
+    parser.add_argument("--schemes", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="add to the existing tables instead of recreating them")
+    args = parser.parse_args()
+
+    configure_environment(args.database_url)
+    from config import config_obj
+
+    async def run():
+        engine = create_async_engine(config_obj.DATABASE_URL)
+        try:
+            return await seed_database(engine, args.users, args.investments, make_scheme_universe(args.schemes, args.seed),
+                                       reset=not args.keep, seed=args.seed)
+        finally:
+            await engine.dispose()
+
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
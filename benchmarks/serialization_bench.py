@@ -0,0 +1,172 @@
+"""
+Response serialization: the response_model path against the direct orjson path.
+
+Portfolio: one user holding --sizes investments in the seeded database. The response_model path loads ORM objects,
+validates them through List[InvestmentViewSchema] and encodes with the stdlib json encoder, like /view-portfolio
+did. The direct path loads view rows and encodes them with orjson. Load and encode are timed separately.
+
+Catalog: the full scheme listing encoded per request with jsonable_encoder and json, against the body encoded and
+compressed once per catalog. The first cached request pays for encoding and compression, later identity requests
+for decompressing the stored gzip variant. Also reports the body size and the cached response time per content
+coding, and what compressing the body per request at the middleware's levels would cost.
+
+    python -m benchmarks.serialization_bench --sizes 100 1000 10000 --schemes 40000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import insert, select
+
+from benchmarks.environment import configure_environment
+from benchmarks.seed import seed_database
+from benchmarks.stats import summarize
+from benchmarks.synthetic import make_scheme_universe
+
+
+async def timed(run, rounds: int) -> tuple:
+    samples = []
+    for _ in range(rounds):
+        started_at = time.perf_counter()
+        result = await run()
+        samples.append((time.perf_counter() - started_at) * 1000)
+    return result, summarize(samples, sum(samples) / 1000)
+
+
+async def bench_portfolio(size: int, universe: list, rounds: int) -> dict:
+    # imported here, these read config which main() sets up first
+    from src.models.db_engine import async_engine, session_maker
+    from src.models.db_models import SchemeNav, User
+    from src.responses import ORJSONResponse
+    from src.services.investment_service import InvestmentService
+    from src.views.investment_schema import InvestmentViewSchema
+
+    await seed_database(async_engine, 1, size, universe)
+    nav_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    async with async_engine.begin() as connection:
+        await connection.execute(insert(SchemeNav.__table__), [
+            {"scheme_code": scheme["Scheme_Code"], "nav": scheme["Net_Asset_Value"], "date": nav_date}
+            for scheme in universe
+        ])
+
+    investment_service = InvestmentService()
+    response_field = create_model_field(name="Response", type_=List[InvestmentViewSchema], mode="serialization")
+
+    async with session_maker() as session:
+        user_id = (await session.exec(select(User.user_id))).first().user_id
+
+        async def load_orm():
+            session.expunge_all()
+            return await investment_service.get_investments_by_user_id(user_id, session)
+
+        async def load_rows():
+            return await investment_service.get_investment_views_by_user_id(user_id, session)
+
+        investments, orm_load = await timed(load_orm, rounds)
+        rows, rows_load = await timed(load_rows, rounds)
+
+    async def encode_validated():
+        content = await serialize_response(field=response_field, response_content=investments)
+        return JSONResponse(content).body
+
+    async def encode_direct():
+        return ORJSONResponse(rows).body
+
+    validated_body, validated_encode = await timed(encode_validated, rounds)
+    direct_body, direct_encode = await timed(encode_direct, rounds)
+    assert json.loads(validated_body) == json.loads(direct_body)
+
+    return {
+        "investments": size,
+        "body_kb": round(len(direct_body) / 1024, 1),
+        "response_model": {"load": orm_load, "encode": validated_encode},
+        "direct": {"load": rows_load, "encode": direct_encode},
+        "encode_speedup": round(validated_encode["p50_ms"] / direct_encode["p50_ms"], 1),
+    }
+
+
+async def bench_catalog(universe: list, rounds: int) -> dict:
+    from config import config_obj
+    from src.compression import ENCODINGS, compress
+    from src.responses import precompressed_json_response
+    from src.services.catalog_service import SchemeCatalog
+
+    catalog = SchemeCatalog(universe)
+    message = "Data fetched successfully"
+    request_levels = {'br': config_obj.COMPRESSION_BROTLI_QUALITY, 'gzip': config_obj.COMPRESSION_GZIP_LEVEL}
+
+    async def encode_per_request():
+        content = jsonable_encoder({"message": message, "data": {"data": catalog.to_dicts()}})
+        return JSONResponse(content).body
+
+    def encode_cached(accept_encoding):
+        async def encode():
+            payload = await catalog.payload(('schemes', message), lambda: {"message": message, "data": {"data": catalog.to_dicts()}})
+            return (await precompressed_json_response(payload, accept_encoding)).body
+        return encode
+
+    _, first_encode = await timed(encode_cached(None), 1)
+    per_request_body, per_request = await timed(encode_per_request, rounds)
+    cached_body, cached = await timed(encode_cached(None), rounds)
+    assert json.loads(per_request_body) == json.loads(cached_body)
+
+    encodings = {}
+    for encoding in ENCODINGS:
+        compressed_body, compressed_cached = await timed(encode_cached(encoding), rounds)
+        _, compressed_per_request = await timed(lambda: asyncio.to_thread(compress, cached_body, encoding,
+                                                                          request_levels[encoding]), min(rounds, 3))
+        encodings[encoding] = {
+            "body_kb": round(len(compressed_body) / 1024, 1),
+            "cached": compressed_cached,
+            "compressed_per_request": compressed_per_request,
+        }
+
+    return {
+        "schemes": len(universe),
+        "body_kb": round(len(cached_body) / 1024, 1),
+        "per_request": per_request,
+        "cached_first_request": first_encode,
+        "cached": cached,
+        "speedup": round(per_request["p50_ms"] / cached["p50_ms"], 1),
+        "encodings": encodings,
+    }
+
+
+async def run(args) -> dict:
+    from src.models.db_engine import async_engine
+
+    universe = make_scheme_universe(max(args.schemes, max(args.sizes)))
+    try:
+        portfolio = {}
+        for size in args.sizes:
+            portfolio[str(size)] = await bench_portfolio(size, universe, args.rounds)
+        return {
+            "benchmark": "serialization",
+            "portfolio": portfolio,
+            "catalog": await bench_catalog(universe, args.rounds),
+        }
+    finally:
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=None, help="defaults to a SQLite file in the temp directory")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--schemes", type=int, default=40000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    configure_environment(args.database_url)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""Latency summaries shared by the benchmarks."""
+import statistics
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def summarize(samples_ms: list, elapsed_s: float = None) -> dict:
+    summary = {
+        "requests": len(samples_ms),
+        "p50_ms": round(statistics.median(samples_ms), 4),
+        "p99_ms": round(percentile(samples_ms, 0.99), 4),
+        "max_ms": round(max(samples_ms), 4),
+    }
+    if elapsed_s:
+        summary["throughput_rps"] = round(len(samples_ms) / elapsed_s, 2)
+    return summary
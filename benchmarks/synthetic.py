@@ -0,0 +1,47 @@
+"""Synthetic RapidAPI-shaped scheme records for the benchmarks."""
+import random
+
+FUND_HOUSES = [
+    "Aditya Birla Sun Life", "Axis", "Bandhan", "Bank of India", "Baroda BNP Paribas", "Canara Robeco",
+    "DSP", "Edelweiss", "Franklin Templeton", "HDFC", "HSBC", "ICICI Prudential", "Invesco", "ITI",
+    "JM Financial", "Kotak Mahindra", "LIC", "Mahindra Manulife", "Mirae Asset", "Motilal Oswal",
+    "Navi", "Nippon India", "PGIM India", "PPFAS", "Quant", "Quantum", "SBI", "Sundaram", "Tata",
+    "Taurus", "Union", "UTI", "WhiteOak Capital", "360 ONE", "Groww", "Helios", "Samco", "Shriram",
+]
+
+CATEGORIES = [
+    ("Equity Scheme - Large Cap Fund", "Bluechip"), ("Equity Scheme - Mid Cap Fund", "Midcap Opportunities"),
+    ("Equity Scheme - Small Cap Fund", "Small Cap"), ("Equity Scheme - Flexi Cap Fund", "Flexi Cap"),
+    ("Equity Scheme - ELSS", "Tax Saver"), ("Equity Scheme - Sectoral/ Thematic", "Banking and Financial Services"),
+    ("Equity Scheme - Sectoral/ Thematic", "Pharma and Healthcare"), ("Equity Scheme - Sectoral/ Thematic", "Technology"),
+    ("Hybrid Scheme - Balanced Advantage", "Balanced Advantage"), ("Hybrid Scheme - Arbitrage Fund", "Arbitrage"),
+    ("Debt Scheme - Liquid Fund", "Liquid"), ("Debt Scheme - Overnight Fund", "Overnight"),
+    ("Debt Scheme - Corporate Bond Fund", "Corporate Bond"), ("Debt Scheme - Gilt Fund", "Gilt"),
+    ("Debt Scheme - Short Duration Fund", "Short Term Debt"), ("Other Scheme - Index Funds", "Nifty 50 Index"),
+    ("Other Scheme - Index Funds", "Nifty Next 50 Index"), ("Other Scheme - FoF Overseas", "US Equity Passive FoF"),
+]
+
+PLANS = ["Direct Plan", "Regular Plan"]
+OPTIONS = ["Growth", "IDCW", "IDCW Reinvestment", "Monthly IDCW", "Quarterly IDCW"]
+
+
+def make_scheme_universe(size: int, seed: int = 42, date: str = "17-Oct-2026") -> list:
+    rng = random.Random(seed)
+    schemes = []
+    for position in range(size):
+        house = FUND_HOUSES[position % len(FUND_HOUSES)]
+        category, theme = CATEGORIES[(position // len(FUND_HOUSES)) % len(CATEGORIES)]
+        plan = PLANS[position % len(PLANS)]
+        option = OPTIONS[(position // 2) % len(OPTIONS)]
+        schemes.append({
+            "Scheme_Code": 100000 + position,
+            "ISIN_Div_Payout_ISIN_Growth": f"INF{rng.randrange(10 ** 8):08d}{position % 10}",
+            "ISIN_Div_Reinvestment": "-",
+            "Scheme_Name": f"{house} {theme} Fund - {plan} - {option}",
+            "Net_Asset_Value": round(rng.uniform(8, 900), 4),
+            "Date": date,
+            "Scheme_Type": "Open Ended Schemes",
+            "Scheme_Category": category,
+            "Mutual_Fund_Family": f"{house} Mutual Fund",
+        })
+    return schemes
@@ -1,19 +1,75 @@
-from pydantic_settings import BaseSettings
-
-from dotenv import load_dotenv
-load_dotenv()
-class Settings(BaseSettings):
-    RAPID_API_URL: str
-    RAPID_API_KEY: str
-    RAPID_API_HOST: str
-    REDIS_URL: str = 'redis://localhost:6379/0'
-    DATABASE_URL: str
-    JWT_SECRET_KEY: str
-    JWT_ALGORITHM: str
-    DOMAIN: str
-
-    class Config:
-        env_file = '.env'
-        extra = 'ignore'
-
+from pydantic_settings import BaseSettings
+
+from dotenv import load_dotenv
+load_dotenv()
+class Settings(BaseSettings):
+    RAPID_API_URL: str
+    RAPID_API_KEY: str
+    RAPID_API_HOST: str
+    REDIS_URL: str = 'redis://localhost:6379/0'
+    DATABASE_URL: str
+    # optional read replica for read-only endpoints, the primary is used when unset
+    DATABASE_READ_URL: str | None = None
+    JWT_SECRET_KEY: str
+    JWT_ALGORITHM: str
+    DOMAIN: str
+
+    # database connection pool, applied to the primary and the read replica engine
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_ECHO: bool = False
+
+    # shared RapidAPI HTTP client, HTTP/2 needs the httpx[http2] extra installed
+    RAPID_API_MAX_CONNECTIONS: int = 20
+    RAPID_API_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    RAPID_API_KEEPALIVE_EXPIRY: float = 30.0
+    RAPID_API_TIMEOUT: float = 15.0
+    RAPID_API_CONNECT_TIMEOUT: float = 5.0
+    RAPID_API_POOL_TIMEOUT: float = 5.0
+    RAPID_API_HTTP2: bool = False
+
+    # 'live', 'snapshot', 'record' or 'fallback', see investment_client.RAPID_API_MODES
+    RAPID_API_MODE: str = 'live'
+    RAPID_API_SNAPSHOT_PATH: str = 'data/rapidapi_snapshot.json.gz'
+
+    # bcrypt work factor and the bounded pool that runs it off the event loop
+    PASSWORD_HASH_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32
+
+    # verified JWT claims cached per worker, entries are evicted at the token's exp
+    TOKEN_CACHE_MAXSIZE: int = 10000
+
+    # in-process scheme catalog behind the fund catalog endpoints, rebuilt after the TTL
+    CATALOG_CACHE_TTL: int = 3600
+
+    # NAV refresh: 'normalized' (scheme_navs only), 'bulk' (plus a set-based UPDATE per scheme)
+    # or 'orm' (plus per-row ORM updates)
+    NAV_UPDATE_MODE: str = 'normalized'
+    # rows per executemany batch, a run is still committed once so holdings and summaries never diverge
+    NAV_UPDATE_BATCH_SIZE: int = 500
+    # number of celery shard tasks the hourly refresh fans out to
+    NAV_UPDATE_SHARDS: int = 8
+    # port of the celery worker's Prometheus endpoint with the NAV refresh metrics, unset to disable it
+    CELERY_METRICS_PORT: int | None = None
+
+    # response compression, bodies below the minimum size go out uncompressed
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    # catalog payloads are compressed once per catalog refresh, so they can afford higher levels
+    CATALOG_GZIP_LEVEL: int = 9
+    CATALOG_BROTLI_QUALITY: int = 9
+
+    # bulk investment import: rows accepted per request and rows per multi-row INSERT
+    BULK_IMPORT_MAX_ROWS: int = 10000
+    BULK_IMPORT_BATCH_SIZE: int = 500
+
+    class Config:
+        env_file = '.env'
+        extra = 'ignore'
+
 config_obj = Settings()
\ No newline at end of file
@@ -1,7 +1,7 @@
-import uvicorn
-
-if __name__ == "__main__":
-    uvicorn.run(
-        app="server:app",
-        workers=1,
+import uvicorn
+
+if __name__ == "__main__":
+    uvicorn.run(
+        app="server:app",
+        workers=1,
     )
\ No newline at end of file
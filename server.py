@@ -1,28 +1,59 @@
-from fastapi import FastAPI
-from src.routes.investment_routes import investment_router
-from src.routes.user_routes import auth_router
-
-def create_app() -> FastAPI:
-    app_ = FastAPI(
-    title='Mutual Fund Broker',
-    description='Backend application for a mutual fund brokerage firm',
-    contact={
-        "name": "Sana Almas",
-        "url": "https://github.com/SanaAlmas",
-        "email": "sanaalmas19@gmail.com",
-    },
-    )
-    return app_
-
-app = create_app()
-
-app.include_router(
-    auth_router,
-    prefix='/mfb/auth',
-    tags=['auth']
-)
-app.include_router(
-    investment_router,
-    prefix="/mfb/investment",
-    tags=['investment']
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from config import config_obj
+from src.clients.investment_client import start_http_client, close_http_client
+from src.errors import register_all_exceptions
+from src.metrics import metrics_response
+from src.middleware import CompressionMiddleware, MetricsMiddleware
+from src.responses import ORJSONResponse
+from src.routes.investment_routes import investment_router
+from src.routes.stats_routes import stats_router
+from src.routes.user_routes import auth_router
+
+@asynccontextmanager
+async def lifespan(app_: FastAPI):
+    await start_http_client()
+    yield
+    await close_http_client()
+
+def create_app() -> FastAPI:
+    app_ = FastAPI(
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+    title='Mutual Fund Broker',
+    description='Backend application for a mutual fund brokerage firm',
+    contact={
+        "name": "Sana Almas",
+        "url": "https://github.com/SanaAlmas",
+        "email": "sanaalmas19@gmail.com",
+    },
+    )
+    register_all_exceptions(app_)
+    app_.add_middleware(
+        CompressionMiddleware,
+        minimum_size=config_obj.COMPRESSION_MINIMUM_SIZE,
+        levels={'br': config_obj.COMPRESSION_BROTLI_QUALITY, 'gzip': config_obj.COMPRESSION_GZIP_LEVEL},
+    )
+    # added last so it is outermost and its latency includes compression
+    app_.add_middleware(MetricsMiddleware)
+    # Prometheus text format, scraped from each worker process
+    app_.add_api_route('/metrics', metrics_response, methods=['GET'], include_in_schema=False)
+    return app_
+
+app = create_app()
+
+app.include_router(
+    auth_router,
+    prefix='/mfb/auth',
+    tags=['auth']
+)
+app.include_router(
+    investment_router,
+    prefix="/mfb/investment",
+    tags=['investment']
+)
+app.include_router(
+    stats_router,
+    prefix="/mfb/stats",
+    tags=['stats']
 )
\ No newline at end of file
@@ -1,56 +1,246 @@
-from fastapi import HTTPException
-from config import config_obj
-import httpx
-
-rapid_api_url = config_obj.RAPID_API_URL
-rapid_api_key = config_obj.RAPID_API_KEY
-rapid_api_host = config_obj.RAPID_API_HOST
-
-headers = {
-    "x-rapidapi-key": rapid_api_key,
-    "x-rapidapi-host": rapid_api_host
-}
-
-
-async def fetch_data_from_api(query):
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(rapid_api_url, headers=headers, params=query)
-
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Error fetching data: {response.text}"
-                )
-            try:
-                data = response.json()
-                return data
-            except ValueError:
-                raise HTTPException(status_code=500, detail="Invalid JSON response from API")
-    except httpx.HTTPError as e:
-        raise HTTPException(status_code=500, detail=f"External API Error: {str(e)}")
-
-async def get_openended_schemes_codes(scheme_code):
-    query = {"Scheme_Type": 'Open Ended Schemes'}
-    data = await fetch_data_from_api(query)
-
-    found_scheme = find_scheme_code(scheme_code, data)
-    return found_scheme if found_scheme else None
-
-def find_scheme_code(scheme_code, data):
-    for scheme in data:
-        if scheme["Scheme_Code"] == scheme_code:
-            return scheme
-    return None
-
-
-async def get_fund_list_RapidAPI(queries):
-    print(queries)
-    query = {"Scheme_Type": 'Open Ended Schemes'}
-    query.update(queries)
-    data = await fetch_data_from_api(query)
-
-    print(type(data))
-    return {
-        "data": data,
-    }
+import asyncio
+import gzip
+import json
+import os
+import time
+from fastapi import HTTPException
+from config import config_obj
+from src.metrics import RAPID_API_LATENCY, RAPID_API_RESPONSE_BYTES
+import httpx
+
+rapid_api_url = config_obj.RAPID_API_URL
+rapid_api_key = config_obj.RAPID_API_KEY
+rapid_api_host = config_obj.RAPID_API_HOST
+
+headers = {
+    "x-rapidapi-key": rapid_api_key,
+    "x-rapidapi-host": rapid_api_host
+}
+
+OPEN_ENDED_SCHEMES_QUERY = {"Scheme_Type": 'Open Ended Schemes'}
+
+# live: RapidAPI only, snapshot: the local snapshot file only, record: live and save the universe to the file,
+# fallback: record, and serve the file when RapidAPI fails
+RAPID_API_MODES = ('live', 'snapshot', 'record', 'fallback')
+
+# first httpcore trace events after a connection has been handed out by the pool
+POOL_ACQUIRED_EVENTS = (
+    "connection.connect_tcp.started",
+    "http11.send_request_headers.started",
+    "http2.send_request_headers.started",
+)
+
+# long-lived client shared by every RapidAPI call, opened and closed by the app lifespan
+http_client: httpx.AsyncClient | None = None
+
+pool_stats = {
+    "requests": 0,
+    "pool_wait_ms_total": 0.0,
+    "pool_wait_ms_max": 0.0,
+}
+
+# the snapshot file this process last read or wrote, the parsed list itself is not kept: the catalog built
+# from it already holds the schemes, in far less memory
+snapshot_state = {
+    "schemes": None,
+    "mtime_ns": None,
+    "loads": 0,
+    "records": 0,
+    "record_errors": 0,
+    "served": 0,
+    "fallbacks": 0,
+}
+
+
+def create_http_client(transport: httpx.AsyncBaseTransport = None) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        headers=headers,
+        limits=httpx.Limits(
+            max_connections=config_obj.RAPID_API_MAX_CONNECTIONS,
+            max_keepalive_connections=config_obj.RAPID_API_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config_obj.RAPID_API_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            config_obj.RAPID_API_TIMEOUT,
+            connect=config_obj.RAPID_API_CONNECT_TIMEOUT,
+            pool=config_obj.RAPID_API_POOL_TIMEOUT,
+        ),
+        http2=config_obj.RAPID_API_HTTP2,
+        transport=transport,
+    )
+
+async def start_http_client(transport: httpx.AsyncBaseTransport = None) -> httpx.AsyncClient:
+    global http_client
+    if http_client is None:
+        http_client = create_http_client(transport)
+    return http_client
+
+async def close_http_client():
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    # callers running outside the app lifespan (scripts, workers) get a lazily created client
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
+
+def get_http_pool_stats() -> dict:
+    connections = []
+    if http_client is not None:
+        pool = getattr(http_client._transport, "_pool", None)
+        connections = pool.connections if pool is not None else []
+
+    idle_connections = sum(1 for connection in connections if connection.is_idle())
+    requests = pool_stats["requests"]
+    return {
+        "active_connections": len(connections) - idle_connections,
+        "idle_connections": idle_connections,
+        "max_connections": config_obj.RAPID_API_MAX_CONNECTIONS,
+        "max_keepalive_connections": config_obj.RAPID_API_MAX_KEEPALIVE_CONNECTIONS,
+        "http2": config_obj.RAPID_API_HTTP2,
+        "requests": requests,
+        "pool_wait_ms_total": round(pool_stats["pool_wait_ms_total"], 3),
+        "pool_wait_ms_avg": round(pool_stats["pool_wait_ms_total"] / requests, 3) if requests else 0.0,
+        "pool_wait_ms_max": round(pool_stats["pool_wait_ms_max"], 3),
+    }
+
+async def _get_from_api(query) -> httpx.Response:
+    requested_at = time.perf_counter()
+    acquired_at = []
+
+    async def trace(event_name, info):
+        if not acquired_at and event_name in POOL_ACQUIRED_EVENTS:
+            acquired_at.append(time.perf_counter())
+
+    response = await get_http_client().get(rapid_api_url, params=query, extensions={"trace": trace})
+
+    pool_wait_ms = ((acquired_at[0] if acquired_at else requested_at) - requested_at) * 1000
+    pool_stats["requests"] += 1
+    pool_stats["pool_wait_ms_total"] += pool_wait_ms
+    pool_stats["pool_wait_ms_max"] = max(pool_stats["pool_wait_ms_max"], pool_wait_ms)
+    return response
+
+
+def get_snapshot_stats() -> dict:
+    return {
+        "mode": config_obj.RAPID_API_MODE,
+        "path": config_obj.RAPID_API_SNAPSHOT_PATH,
+        "schemes": snapshot_state["schemes"],
+        **{key: snapshot_state[key] for key in ("loads", "records", "record_errors", "served", "fallbacks")},
+    }
+
+
+def _read_snapshot(path: str) -> list:
+    with gzip.open(path, "rb") as snapshot_file:
+        return json.load(snapshot_file)
+
+
+def _write_snapshot(path: str, schemes: list) -> int:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # written next to the target and renamed, readers in other workers never see a partial file
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with gzip.open(temporary_path, "wt", encoding="utf-8") as snapshot_file:
+            json.dump(schemes, snapshot_file, separators=(",", ":"))
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    return os.stat(path).st_mtime_ns
+
+
+async def load_snapshot() -> list:
+    """
+    Parsed scheme universe from the snapshot file.
+
+    Read on every call and not kept, callers only need it to build the catalog, which the catalog service
+    already caches and loads once for concurrent requests.
+    """
+    path = config_obj.RAPID_API_SNAPSHOT_PATH
+    mtime_ns = os.stat(path).st_mtime_ns
+    # decompressing and parsing tens of MB would block the event loop
+    schemes = await asyncio.to_thread(_read_snapshot, path)
+    snapshot_state["schemes"] = len(schemes)
+    snapshot_state["mtime_ns"] = mtime_ns
+    snapshot_state["loads"] += 1
+    return schemes
+
+
+# best effort: a snapshot that cannot be written must not fail the live response it was recorded from
+async def record_snapshot(schemes: list):
+    try:
+        mtime_ns = await asyncio.to_thread(_write_snapshot, config_obj.RAPID_API_SNAPSHOT_PATH, schemes)
+    except (OSError, ValueError, TypeError) as e:
+        snapshot_state["record_errors"] += 1
+        print(f"Error recording the RapidAPI snapshot: {str(e)}")
+        return
+
+    snapshot_state["schemes"] = len(schemes)
+    snapshot_state["mtime_ns"] = mtime_ns
+    snapshot_state["records"] += 1
+
+
+# the snapshot holds the whole open-ended universe, narrower queries are answered by filtering it
+async def fetch_data_from_snapshot(query) -> list:
+    try:
+        schemes = await load_snapshot()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=503, detail=f"RapidAPI snapshot not available: {str(e)}")
+
+    snapshot_state["served"] += 1
+    if query == OPEN_ENDED_SCHEMES_QUERY:
+        return schemes
+    return [scheme for scheme in schemes if all(str(scheme.get(key)) == str(value) for key, value in query.items())]
+
+
+async def fetch_data_from_api(query):
+    mode = config_obj.RAPID_API_MODE
+    if mode not in RAPID_API_MODES:
+        raise ValueError(f"Unknown RapidAPI mode: {mode}")
+
+    if mode == 'snapshot':
+        return await fetch_data_from_snapshot(query)
+
+    try:
+        data = await fetch_data_from_rapid_api(query)
+    except HTTPException:
+        if mode != 'fallback' or not os.path.exists(config_obj.RAPID_API_SNAPSHOT_PATH):
+            raise
+        snapshot_state["fallbacks"] += 1
+        return await fetch_data_from_snapshot(query)
+
+    # only a full universe response can replace the snapshot
+    if mode in ('record', 'fallback') and query == OPEN_ENDED_SCHEMES_QUERY and isinstance(data, list):
+        await record_snapshot(data)
+    return data
+
+
+async def fetch_data_from_rapid_api(query):
+    requested_at = time.perf_counter()
+    try:
+        response = await _get_from_api(query)
+        RAPID_API_LATENCY.labels('ok' if response.status_code == 200 else 'error').observe(time.perf_counter() - requested_at)
+        RAPID_API_RESPONSE_BYTES.observe(len(response.content))
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Error fetching data: {response.text}"
+            )
+        try:
+            # the full universe is several MB of JSON, decode it in a worker thread so the event loop keeps serving
+            return await asyncio.to_thread(json.loads, response.content)
+        except ValueError:
+            raise HTTPException(status_code=500, detail="Invalid JSON response from API")
+    except httpx.HTTPError as e:
+        RAPID_API_LATENCY.labels('error').observe(time.perf_counter() - requested_at)
+        raise HTTPException(status_code=500, detail=f"External API Error: {str(e)}")
+
+async def get_openended_schemes():
+    """Download the whole open-ended scheme universe in a single call."""
+    return await fetch_data_from_api(dict(OPEN_ENDED_SCHEMES_QUERY))
@@ -0,0 +1,104 @@
+import asyncio
+import gzip
+import zlib
+
+import brotli
+
+# content codings we produce, in server preference order
+ENCODINGS = ('br', 'gzip')
+COMPRESSIBLE_CONTENT_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+
+# the preferred coding the client accepts (q > 0), None for identity
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, _, parameters = item.partition(';')
+        weight = 1.0
+        for parameter in parameters.split(';'):
+            name, _, value = parameter.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    for encoding in ENCODINGS:
+        if weights.get(encoding, weights.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def is_compressible(content_type: str | None) -> bool:
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=level)
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+# a compressed body is a different representation, its ETag may only match weakly (RFC 9110 8.8.3.3)
+def weaken_etag(etag: str) -> str:
+    return etag if etag.startswith('W/') else f'W/{etag}'
+
+
+class StreamCompressor:
+    """
+    Incremental gzip or brotli compression for bodies sent in several chunks.
+
+    Every chunk is flushed, so the client can decode everything sent so far instead of waiting for the
+    compressor's buffer to fill. Each flush costs a few bytes, senders should keep chunks at a few KB or more.
+    """
+
+    def __init__(self, encoding: str, level: int):
+        self._brotli = encoding == 'br'
+        if self._brotli:
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self._brotli:
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish() if self._brotli else self._compressor.flush()
+
+
+class PrecompressedBody:
+    """
+    A response body stored in its compressed variants, compressed once and served to every client.
+
+    Once a gzip variant exists the plain body is not kept, the rare client that accepts no coding gets the
+    gzip variant decompressed, which is far cheaper than holding the body uncompressed.
+    """
+
+    __slots__ = ('_body', 'variants')
+
+    def __init__(self, body: bytes, levels: dict, minimum_size: int = 0):
+        self.variants = {}
+        if len(body) >= minimum_size:
+            self.variants = {encoding: compress(body, encoding, level) for encoding, level in levels.items()}
+        self._body = None if 'gzip' in self.variants else body
+
+    # bytes held for this body
+    @property
+    def nbytes(self) -> int:
+        return len(self._body or b'') + sum(len(variant) for variant in self.variants.values())
+
+    # (body, coding) for the client's Accept-Encoding, coding is None for the uncompressed body
+    async def select(self, accept_encoding: str | None) -> tuple[bytes, str | None]:
+        encoding = choose_encoding(accept_encoding)
+        if encoding in self.variants:
+            return self.variants[encoding], encoding
+        if self._body is not None:
+            return self._body, None
+        return await asyncio.to_thread(gzip.decompress, self.variants['gzip']), None
@@ -0,0 +1,98 @@
+import glob
+import os
+import time
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+    start_http_server,
+)
+from sqlalchemy import event
+
+# statement verbs kept as label values, anything else is reported as OTHER
+DB_OPERATIONS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+NAV_REFRESH_ROW_COUNTERS = ('schemes_total', 'schemes_changed', 'schemes_skipped', 'investments', 'summaries_updated')
+
+REQUEST_LATENCY = Histogram(
+    'mfb_http_request_duration_seconds', 'HTTP request latency by route template',
+    ['method', 'route'],
+)
+REQUESTS = Counter(
+    'mfb_http_requests_total', 'HTTP requests by route template and status code',
+    ['method', 'route', 'status'],
+)
+DB_QUERY_LATENCY = Histogram(
+    'mfb_db_query_duration_seconds', 'Database statement execution time',
+    ['engine', 'operation'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+RAPID_API_LATENCY = Histogram(
+    'mfb_rapid_api_request_duration_seconds', 'RapidAPI call latency',
+    ['outcome'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0),
+)
+RAPID_API_RESPONSE_BYTES = Histogram(
+    'mfb_rapid_api_response_bytes', 'RapidAPI response body size',
+    buckets=(1e3, 1e4, 1e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 2.5e7),
+)
+NAV_REFRESH_DURATION = Histogram(
+    'mfb_nav_refresh_duration_seconds', 'NAV refresh run duration',
+    ['mode', 'outcome'],
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+NAV_REFRESH_ROWS = Counter(
+    'mfb_nav_refresh_rows_total', 'Rows handled by NAV refresh runs',
+    ['mode', 'kind'],
+)
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+# the celery worker's metrics endpoint. Prefork pool processes write their samples to PROMETHEUS_MULTIPROC_DIR
+# and the worker's main process serves them added up, without it only the main process's own samples are served
+def start_worker_metrics_server(port: int):
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if not multiproc_dir:
+        start_http_server(port)
+        return
+
+    # samples left by a previous worker run would be added to this one's
+    for path in glob.glob(os.path.join(multiproc_dir, '*.db')):
+        os.remove(path)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=multiproc_dir)
+    start_http_server(port, registry=registry)
+
+
+def observe_nav_refresh(run_stats: dict, outcome: str):
+    NAV_REFRESH_DURATION.labels(run_stats['mode'], outcome).observe(run_stats['elapsed_ms'] / 1000)
+    for kind in NAV_REFRESH_ROW_COUNTERS:
+        NAV_REFRESH_ROWS.labels(run_stats['mode'], kind).inc(run_stats[kind])
+
+
+def statement_operation(statement: str) -> str:
+    operation = statement.lstrip()[:6].upper()
+    return operation if operation in DB_OPERATIONS else 'OTHER'
+
+
+# times every statement sent through the engine, including executemany batches
+def instrument_engine(async_engine, engine_name: str):
+    sync_engine = async_engine.sync_engine
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started_at', []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started_at = conn.info['query_started_at'].pop()
+        DB_QUERY_LATENCY.labels(engine_name, statement_operation(statement)).observe(time.perf_counter() - started_at)
+
+    @event.listens_for(sync_engine, 'handle_error')
+    def handle_error(exception_context):
+        # a failed statement never reaches after_cursor_execute
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('query_started_at'):
+            connection.info['query_started_at'].pop()
@@ -0,0 +1,137 @@
+import asyncio
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from src.compression import StreamCompressor, choose_encoding, compress, is_compressible, weaken_etag
+from src.metrics import REQUEST_LATENCY, REQUESTS
+
+OFFLOAD_COMPRESSION_SIZE = 256 * 1024
+
+
+class MetricsMiddleware:
+    """
+    Records latency and status per route template for every HTTP request.
+
+    Plain ASGI instead of BaseHTTPMiddleware so streaming responses pass through untouched,
+    the latency covers the full response body.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # the matched route template keeps the label set bounded, unknown paths share one label
+            route = scope.get('route')
+            route_path = route.path if route is not None else 'unmatched'
+            REQUEST_LATENCY.labels(scope['method'], route_path).observe(time.perf_counter() - started_at)
+            REQUESTS.labels(scope['method'], route_path, str(status_code)).inc()
+
+
+# responses that already vary on Accept-Encoding, like the pre-compressed ones, keep a single entry
+def vary_on_accept_encoding(headers: MutableHeaders) -> None:
+    if 'accept-encoding' not in headers.get('vary', '').lower():
+        headers.add_vary_header('Accept-Encoding')
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli/gzip compression of response bodies.
+
+    Bodies under minimum_size and non-text content go out as they are. Responses that already carry a
+    Content-Encoding, like the pre-compressed catalog payloads, are passed through untouched. Streaming
+    responses are compressed chunk by chunk, each chunk flushed so clients can decode it on arrival.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, levels: dict = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        # compression level per content coding
+        self.levels = levels or {'br': 4, 'gzip': 6}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get('accept-encoding'))
+
+        start_message = None
+        compressor = None
+        # 'pending' until the first body chunk decides, then 'identity' or 'compressing'
+        state = 'pending'
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, state
+            if message['type'] == 'http.response.start':
+                headers = Headers(raw=message['headers'])
+                if (message['status'] in (204, 304) or 'content-encoding' in headers
+                        or not is_compressible(headers.get('content-type'))):
+                    state = 'identity'
+                    await send(message)
+                elif encoding is None:
+                    # not compressed for this client, but another one would get a compressed body
+                    state = 'identity'
+                    vary_on_accept_encoding(MutableHeaders(scope=message))
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if message['type'] != 'http.response.body' or state == 'identity':
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if state == 'compressing':
+                body = compressor.compress(body)
+                if not more_body:
+                    body += compressor.finish()
+                await send({'type': 'http.response.body', 'body': body, 'more_body': more_body})
+                return
+
+            headers = MutableHeaders(scope=start_message)
+            vary_on_accept_encoding(headers)
+            if not more_body and len(body) < self.minimum_size:
+                state = 'identity'
+                await send(start_message)
+                await send(message)
+                return
+
+            headers['Content-Encoding'] = encoding
+            if 'etag' in headers:
+                headers['ETag'] = weaken_etag(headers['etag'])
+            if more_body:
+                state = 'compressing'
+                compressor = StreamCompressor(encoding, self.levels[encoding])
+                del headers['content-length']
+                body = compressor.compress(body)
+            else:
+                state = 'identity'
+                # large bodies are compressed in a worker thread so the event loop keeps serving meanwhile
+                if len(body) >= OFFLOAD_COMPRESSION_SIZE:
+                    body = await asyncio.to_thread(compress, body, encoding, self.levels[encoding])
+                else:
+                    body = compress(body, encoding, self.levels[encoding])
+                headers['Content-Length'] = str(len(body))
+            await send(start_message)
+            await send({'type': 'http.response.body', 'body': body, 'more_body': more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -11,6 +11,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")
 
 from src.models.db_models import User
 from src.models.db_models import Investment
+from src.models.db_models import SchemeNav
+from src.models.db_models import PortfolioSummary
 from src.models.db_models import Base
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,34 @@
+"""Add scheme_navs table
+
+Revision ID: 3f1c9a7d2e64
+Revises: b949df8e402d
+Create Date: 2026-10-18 09:12:44.502318+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2e64'
+down_revision: Union[str, None] = 'b949df8e402d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('scheme_navs',
+    sa.Column('scheme_code', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('nav', sa.Float(), nullable=False),
+    sa.Column('date', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('scheme_code')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('scheme_navs')
@@ -0,0 +1,33 @@
+"""Add investments.purchase_nav
+
+Revision ID: 5a8c3e2f9d17
+Revises: e7b3d91a5c02
+Create Date: 2026-10-18 16:20:13.541872+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a8c3e2f9d17'
+down_revision: Union[str, None] = 'e7b3d91a5c02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('investments', sa.Column('purchase_nav', sa.Float(), nullable=True))
+    # nav is the best cost basis there is for existing rows, it is what the portfolio summaries were built from
+    op.execute('UPDATE investments SET purchase_nav = nav')
+    with op.batch_alter_table('investments') as batch_op:
+        batch_op.alter_column('purchase_nav', existing_type=sa.Float(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('investments') as batch_op:
+        batch_op.drop_column('purchase_nav')
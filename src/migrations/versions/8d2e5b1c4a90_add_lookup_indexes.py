@@ -0,0 +1,36 @@
+"""Add lookup indexes and unique constraints
+
+Revision ID: 8d2e5b1c4a90
+Revises: 3f1c9a7d2e64
+Create Date: 2026-10-18 10:41:27.118904+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e5b1c4a90'
+down_revision: Union[str, None] = '3f1c9a7d2e64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the unique indexes fail if duplicate emails or (user_id, scheme_code) rows already exist,
+    # those have to be merged before upgrading
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_investments_user_id_scheme_code', 'investments', ['user_id', 'scheme_code'], unique=True)
+    op.create_index('ix_investments_user_id_created_at', 'investments', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_investments_scheme_code', 'investments', ['scheme_code'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_investments_scheme_code', table_name='investments')
+    op.drop_index('ix_investments_user_id_created_at', table_name='investments')
+    op.drop_index('ix_investments_user_id_scheme_code', table_name='investments')
+    op.drop_index('ix_users_email', table_name='users')
@@ -0,0 +1,67 @@
+"""Add portfolio_summaries table
+
+Revision ID: c4a19e7f6b21
+Revises: 8d2e5b1c4a90
+Create Date: 2026-10-18 13:32:05.604217+00:00
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a19e7f6b21'
+down_revision: Union[str, None] = '8d2e5b1c4a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    portfolio_summaries = op.create_table('portfolio_summaries',
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('invested_value', sa.Float(), nullable=False),
+    sa.Column('current_value', sa.Float(), nullable=False),
+    sa.Column('holdings', sa.Integer(), nullable=False),
+    sa.Column('family_breakdown', sa.JSON(), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # every existing user gets a summary now, computed like PortfolioSummaryService.rebuild_summaries,
+    # so the first writes after the deploy do not all have to create one
+    connection = op.get_bind()
+    family_breakdowns = {user_id: {} for user_id, in connection.execute(sa.text('SELECT user_id FROM users'))}
+    result = connection.execute(sa.text(
+        'SELECT i.user_id, i.fund_family, SUM(i.units * i.nav), SUM(COALESCE(i.units * n.nav, i.current_value)), '
+        'COUNT(*) FROM investments i LEFT JOIN scheme_navs n ON n.scheme_code = i.scheme_code '
+        'GROUP BY i.user_id, i.fund_family'
+    ))
+    for user_id, fund_family, invested_value, current_value, holdings in result:
+        family_breakdowns.setdefault(user_id, {})[fund_family] = {
+            'invested_value': round(invested_value, 4),
+            'current_value': round(current_value, 4),
+            'holdings': holdings,
+        }
+
+    updated_at = datetime.now(timezone.utc)
+    op.bulk_insert(portfolio_summaries, [
+        {
+            'user_id': user_id,
+            'invested_value': round(sum(values['invested_value'] for values in family_breakdown.values()), 4),
+            'current_value': round(sum(values['current_value'] for values in family_breakdown.values()), 4),
+            'holdings': sum(values['holdings'] for values in family_breakdown.values()),
+            'family_breakdown': family_breakdown,
+            'updated_at': updated_at,
+        }
+        for user_id, family_breakdown in family_breakdowns.items()
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('portfolio_summaries')
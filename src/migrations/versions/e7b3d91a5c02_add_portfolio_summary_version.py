@@ -0,0 +1,28 @@
+"""Add portfolio_summaries.version
+
+Revision ID: e7b3d91a5c02
+Revises: c4a19e7f6b21
+Create Date: 2026-10-18 14:05:41.218503+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3d91a5c02'
+down_revision: Union[str, None] = 'c4a19e7f6b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('portfolio_summaries', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('portfolio_summaries', 'version')
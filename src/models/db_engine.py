@@ -1,25 +1,70 @@
-from config import config_obj
-from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.orm import sessionmaker
-from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import AsyncGenerator
-
-async_engine = create_async_engine(config_obj.DATABASE_URL, echo=True, future=True)
-
-session_maker = sessionmaker(
-    bind=async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,
-)
-
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async with session_maker() as session:
-        yield session
-
-async def commit_session(session: AsyncSession):
-    try:
-        await session.commit()
-    except Exception as e:
-        await session.rollback()
-        raise e
+from config import config_obj
+from src.metrics import instrument_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import AsyncGenerator
+
+def create_pooled_engine(database_url: str):
+    return create_async_engine(
+        database_url,
+        echo=config_obj.DB_ECHO,
+        future=True,
+        pool_size=config_obj.DB_POOL_SIZE,
+        max_overflow=config_obj.DB_MAX_OVERFLOW,
+        pool_timeout=config_obj.DB_POOL_TIMEOUT,
+        pool_recycle=config_obj.DB_POOL_RECYCLE,
+        pool_pre_ping=config_obj.DB_POOL_PRE_PING,
+    )
+
+async_engine = create_pooled_engine(config_obj.DATABASE_URL)
+
+# read-only endpoints go to the replica when one is configured, otherwise they share the primary
+read_engine = create_pooled_engine(config_obj.DATABASE_READ_URL) if config_obj.DATABASE_READ_URL else async_engine
+
+instrument_engine(async_engine, 'primary')
+if read_engine is not async_engine:
+    instrument_engine(read_engine, 'read')
+
+session_maker = sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
+read_session_maker = sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    async with session_maker() as session:
+        yield session
+
+# replicas lag behind the primary, only use this for reads that can tolerate slightly stale data
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    async with read_session_maker() as session:
+        yield session
+
+async def commit_session(session: AsyncSession):
+    try:
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        raise e
+
+# for code running outside the API process, e.g. celery tasks that call asyncio.run() per task:
+# pooled connections are bound to the event loop that opened them, so these engines do not pool
+def create_task_session_maker():
+    engine = create_async_engine(config_obj.DATABASE_URL, echo=False, future=True, poolclass=NullPool)
+    task_session_maker = sessionmaker(
+        bind=engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+    )
+    return engine, task_session_maker
@@ -1,36 +1,82 @@
-import uuid
-from datetime import datetime
-
-from sqlalchemy import Integer, String, Float, ForeignKey, Boolean, Column, TIMESTAMP
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-
-Base = declarative_base()
-
-class User(Base):
-    __tablename__ = 'users'
-
-    user_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), nullable=False)
-    email = Column(String(255), nullable=False)
-    password_hash = Column(String(255), nullable=False)
-    is_verified = Column(Boolean, default=True)
-    created_at = Column(TIMESTAMP(timezone=True), default=datetime.now)
-    updated_at = Column(TIMESTAMP(timezone=True), default=datetime.now, onupdate=datetime.now)
-
-    investments = relationship('Investment', back_populates='user', lazy='selectin')
-
-class Investment(Base):
-    __tablename__ = 'investments'
-
-    investment_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), nullable=False)
-    scheme_name = Column(String(255), nullable=False)
-    scheme_code = Column(Integer, nullable=False)
-    units = Column(Float, nullable=False)
-    nav = Column(Float, nullable=False)
-    date = Column(TIMESTAMP(timezone=True), default=datetime.now)
-    current_value = Column(Float, nullable=False)
-    fund_family = Column(String(255), nullable=False)
-    user_id = Column(String(36), ForeignKey('users.user_id'), nullable=False)
-    user = relationship("User", back_populates="investments")
-    created_at = Column(TIMESTAMP(timezone=True), default=datetime.now)
-    updated_at = Column(TIMESTAMP(timezone=True), default=datetime.now, onupdate=datetime.now)
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Integer, String, Float, ForeignKey, Boolean, Column, TIMESTAMP, Index, JSON
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
+
+Base = declarative_base()
+
+
+# an investment is bought at the nav it is created with
+def _purchase_nav_default(context):
+    return context.get_current_parameters()['nav']
+
+
+class User(Base):
+    __tablename__ = 'users'
+    __table_args__ = (
+        Index('ix_users_email', 'email', unique=True),
+    )
+
+    user_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), nullable=False)
+    email = Column(String(255), nullable=False)
+    password_hash = Column(String(255), nullable=False)
+    is_verified = Column(Boolean, default=True)
+    created_at = Column(TIMESTAMP(timezone=True), default=datetime.now)
+    updated_at = Column(TIMESTAMP(timezone=True), default=datetime.now, onupdate=datetime.now)
+
+    # loaded per query (see UserService), only /me needs a user's investments
+    investments = relationship('Investment', back_populates='user', lazy='raise')
+
+class Investment(Base):
+    __tablename__ = 'investments'
+    __table_args__ = (
+        Index('ix_investments_user_id_scheme_code', 'user_id', 'scheme_code', unique=True),
+        Index('ix_investments_user_id_created_at', 'user_id', 'created_at'),
+        Index('ix_investments_scheme_code', 'scheme_code'),
+    )
+
+    investment_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), nullable=False)
+    scheme_name = Column(String(255), nullable=False)
+    scheme_code = Column(Integer, nullable=False)
+    units = Column(Float, nullable=False)
+    nav = Column(Float, nullable=False)
+    # cost basis of the holding, the invested value of the portfolio summary. The legacy NAV refresh modes
+    # overwrite nav with the latest NAV, nothing but the insert writes this column
+    purchase_nav = Column(Float, nullable=False, default=_purchase_nav_default)
+    date = Column(TIMESTAMP(timezone=True), default=datetime.now)
+    current_value = Column(Float, nullable=False)
+    fund_family = Column(String(255), nullable=False)
+    user_id = Column(String(36), ForeignKey('users.user_id'), nullable=False)
+    user = relationship("User", back_populates="investments")
+    # latest nav for the scheme, joined in so current_value can be derived at read time
+    scheme_nav = relationship(
+        'SchemeNav',
+        primaryjoin='foreign(Investment.scheme_code) == SchemeNav.scheme_code',
+        viewonly=True,
+        lazy='joined',
+    )
+    created_at = Column(TIMESTAMP(timezone=True), default=datetime.now)
+    updated_at = Column(TIMESTAMP(timezone=True), default=datetime.now, onupdate=datetime.now)
+
+class SchemeNav(Base):
+    __tablename__ = 'scheme_navs'
+
+    scheme_code = Column(Integer, primary_key=True, autoincrement=False, nullable=False)
+    nav = Column(Float, nullable=False)
+    date = Column(TIMESTAMP(timezone=True), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), default=datetime.now, onupdate=datetime.now)
+
+class PortfolioSummary(Base):
+    __tablename__ = 'portfolio_summaries'
+
+    user_id = Column(String(36), ForeignKey('users.user_id'), primary_key=True, nullable=False)
+    invested_value = Column(Float, nullable=False, default=0.0)
+    current_value = Column(Float, nullable=False, default=0.0)
+    holdings = Column(Integer, nullable=False, default=0)
+    # {fund_family: {'invested_value': ..., 'current_value': ..., 'holdings': ...}}
+    family_breakdown = Column(JSON, nullable=False, default=dict)
+    # bumped on every write, the ETag of the user's portfolio responses
+    version = Column(Integer, nullable=False, default=0, server_default='0')
+    updated_at = Column(TIMESTAMP(timezone=True), default=datetime.now, onupdate=datetime.now)
\ No newline at end of file
@@ -0,0 +1,75 @@
+import hashlib
+
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse as FastAPIORJSONResponse
+
+from src.compression import PrecompressedBody, weaken_etag
+
+# per-user responses, clients have to revalidate before reusing a stored copy
+CONDITIONAL_CACHE_CONTROL = 'private, no-cache'
+
+
+class ORJSONResponse(FastAPIORJSONResponse):
+    """
+    orjson-encoded JSON response, also the app's default response class.
+
+    UTC datetimes end in 'Z' like pydantic writes them, so endpoints that skip the response_model
+    pass keep the same output.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+class PrecompressedJSONResponse(Response):
+    """
+    JSON response with a body already in the coding the client accepts, see precompressed_json_response.
+
+    Sets Content-Encoding itself, so CompressionMiddleware passes it through instead of compressing again.
+    """
+
+    media_type = 'application/json'
+
+    def __init__(self, body: bytes, encoding: str | None, vary: bool, headers: dict | None = None):
+        headers = dict(headers or {})
+        if vary:
+            headers['Vary'] = 'Accept-Encoding'
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+            if 'ETag' in headers:
+                headers['ETag'] = weaken_etag(headers['ETag'])
+        super().__init__(body, headers=headers)
+
+
+# the PrecompressedBody in the coding the client accepts
+async def precompressed_json_response(payload: PrecompressedBody, accept_encoding: str | None,
+                                      headers: dict | None = None) -> PrecompressedJSONResponse:
+    body, encoding = await payload.select(accept_encoding)
+    return PrecompressedJSONResponse(body, encoding, bool(payload.variants), headers)
+
+
+# strong ETag for a response derived from versioned state, the parts name the state and its version
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b(':'.join(str(part) for part in parts).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+# If-None-Match is compared weakly (RFC 9110 13.1.2) and may list several tags or be '*'
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+
+# None without an ETag, so callers can pass the result straight to a response
+def etag_headers(etag: str | None) -> dict | None:
+    if etag is None:
+        return None
+    return {'ETag': etag, 'Cache-Control': CONDITIONAL_CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -1,154 +1,351 @@
-from typing import List
-from fastapi import APIRouter, status, Depends, HTTPException
-from sqlalchemy.exc import SQLAlchemyError
-from src.services.authorization_service import AccessTokenBearer
-from src.errors import InvestmentNotFound, SchemeCodeAlreadyExists
-from src.models.db_engine import get_session
-from src.views.investment_schema import InvestmentViewSchema, InvestmentCreateSchema, InvestmentUpdateSchema
-from src.services.investment_service import InvestmentService
-from sqlmodel.ext.asyncio.session import AsyncSession
-import requests
-
-investment_router = APIRouter()
-investment_service = InvestmentService()
-access_token_bearer = AccessTokenBearer()
-
-
-def handle_error(exception: Exception, message: str = "An unexpected error occurred", status_code: int = 500):
-    raise HTTPException(status_code=status_code, detail=message)
-
-
-@investment_router.get('/get-an-investment/{scheme_code}', response_model=InvestmentViewSchema,
-                       status_code=status.HTTP_200_OK)
-async def get_an_investment(scheme_code: int, session: AsyncSession = Depends(get_session),
-                            token_details: dict = Depends(access_token_bearer)) -> dict:
-    try:
-        user_id = token_details.get('user')['user_id']
-        investment = await investment_service.get_investment_by_user_id_scheme_code(user_id, scheme_code, session)
-
-        if not investment:
-            raise InvestmentNotFound()
-
-        return investment
-    except InvestmentNotFound:
-        handle_error("Investment not found", status_code=404)
-    except SQLAlchemyError as e:
-        handle_error(e, "Database error", status_code=500)
-    except Exception as e:
-        handle_error(e)
-
-
-@investment_router.get('/view-portfolio', response_model=List[InvestmentViewSchema], status_code=status.HTTP_200_OK)
-async def get_portfolio(session: AsyncSession = Depends(get_session),
-                        token_details: dict = Depends(access_token_bearer)) -> list:
-    try:
-        user_id = token_details.get('user')['user_id']
-        investments = await investment_service.get_investments_by_user_id(user_id, session)
-
-        if not investments:
-            raise InvestmentNotFound()
-
-        return investments
-    except InvestmentNotFound:
-        handle_error("No investments found", status_code=404)
-    except SQLAlchemyError as e:
-        handle_error(e, "Database error", status_code=500)
-    except Exception as e:
-        handle_error(e)
-
-
-@investment_router.post('', response_model=InvestmentViewSchema, status_code=status.HTTP_201_CREATED)
-async def create_an_investment(investment_data: InvestmentCreateSchema, session: AsyncSession = Depends(get_session),
-                               token_details: dict = Depends(access_token_bearer)) -> dict:
-    try:
-        user_id = token_details.get('user')['user_id']
-        existing_investment = await investment_service.get_investment_by_user_id_scheme_code(
-            user_id, investment_data.scheme_code, session
-        )
-
-        if existing_investment:
-            raise SchemeCodeAlreadyExists()
-
-        investment = await investment_service.create_an_investment(investment_data, user_id, session)
-        return investment
-    except SchemeCodeAlreadyExists:
-        handle_error("Scheme code already exists", status_code=400)
-    except SQLAlchemyError as e:
-        handle_error(e, "Database error", status_code=500)
-    except Exception as e:
-        handle_error(e)
-
-
-@investment_router.patch('', response_model=InvestmentViewSchema, status_code=status.HTTP_200_OK)
-async def update_an_investment(investment_data: InvestmentUpdateSchema, session: AsyncSession = Depends(get_session),
-                               token_details: dict = Depends(access_token_bearer)) -> dict:
-    try:
-        user_id = token_details.get('user')['user_id']
-        investment = await investment_service.update_an_investment(user_id, investment_data, session)
-
-        if not investment:
-            raise InvestmentNotFound()
-
-        return investment
-    except InvestmentNotFound:
-        handle_error("Investment not found", status_code=404)
-    except SQLAlchemyError as e:
-        handle_error(e, "Database error", status_code=500)
-    except Exception as e:
-        handle_error(e)
-
-
-@investment_router.delete('/delete-an-investment/{scheme_code}', status_code=status.HTTP_204_NO_CONTENT)
-async def delete_an_investment(scheme_code: int, session: AsyncSession = Depends(get_session),
-                               token_details: dict = Depends(access_token_bearer)) -> None:
-    try:
-        user_id = token_details.get('user')['user_id']
-        investment = await investment_service.delete_an_investment(user_id, scheme_code, session)
-
-        if not investment:
-            raise InvestmentNotFound()
-    except InvestmentNotFound:
-        handle_error("Investment not found", status_code=404)
-    except SQLAlchemyError as e:
-        handle_error(e, "Database error", status_code=500)
-    except Exception as e:
-        handle_error(e)
-
-
-@investment_router.get('/get-json-data-RapidAPI', status_code=status.HTTP_200_OK)
-async def get_RapidAPI_data_from_API(token_details: dict = Depends(access_token_bearer)):
-    try:
-        data = await investment_service.get_funds_from_RapidAPI()
-        return {"message": "Data fetched successfully", "data": data}
-    except requests.RequestException as e:
-        handle_error(e, "Failed to fetch data from RapidAPI", status_code=502)
-    except Exception as e:
-        handle_error(e)
-
-
-@investment_router.get('/get-all-fund-families', status_code=status.HTTP_200_OK)
-async def get_RapidAPI_fund_families(token_details: dict = Depends(access_token_bearer)):
-    try:
-        data = await investment_service.get_famity_funds_from_RapidAPI()
-        return {"message": "Fund families retrieved successfully", "data": data}
-    except requests.RequestException as e:
-        handle_error(e, "Failed to fetch fund families", status_code=502)
-    except Exception as e:
-        handle_error(e)
-
-
-@investment_router.get('/get-fund-family-open-funds', status_code=status.HTTP_200_OK)
-async def get_RapidAPI_fund_families(token_details: dict = Depends(access_token_bearer), fund_family: str = None):
-    try:
-        data = await investment_service.get_open_funds_by_family(fund_family)
-        return {"message": "Open funds retrieved successfully", "data": data}
-    except requests.RequestException as e:
-        handle_error(e, "Failed to fetch open funds", status_code=502)
-    except Exception as e:
-        handle_error(e)
-
-# update nav of all the investments
-@investment_router.post('/update-all-navs', status_code=status.HTTP_200_OK)
-async def update_all_navs_hourly(session: AsyncSession = Depends(get_session)):
-    is_update_done = await investment_service.update_nav_for_all_investments(session)
+import asyncio
+import csv
+from typing import List, Literal
+from fastapi import APIRouter, status, Depends, HTTPException, Query, Body, UploadFile, File, Header, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+import orjson
+from src.services.authorization_service import AccessTokenBearer
+from src.errors import InvestmentNotFound, SchemeCodeAlreadyExists
+from src.models.db_engine import get_session, get_read_session
+from src.responses import ORJSONResponse, etag_headers, etag_matches, make_etag, not_modified, precompressed_json_response
+from src.views.investment_schema import InvestmentViewSchema, InvestmentCreateSchema, InvestmentUpdateSchema, PortfolioSummarySchema
+from src.services.catalog_service import SchemeCatalog
+from src.services.investment_service import InvestmentService
+from src.services.portfolio_service import portfolio_summary_service
+from sqlmodel.ext.asyncio.session import AsyncSession
+from config import config_obj
+import requests
+
+# upper bound for one page of the scheme listing
+MAX_PAGE_SIZE = 1000
+MAX_SEARCH_RESULTS = 50
+# the compressor flushes every streamed chunk, per record the flushes would cost more than they save
+NDJSON_CHUNK_SIZE = 16 * 1024
+
+investment_router = APIRouter()
+investment_service = InvestmentService()
+access_token_bearer = AccessTokenBearer()
+
+
+def handle_error(exception: Exception, message: str = "An unexpected error occurred", status_code: int = 500):
+    raise HTTPException(status_code=status_code, detail=message)
+
+
+# versioned by the user's summary row, None until that row exists and the response then goes out without an ETag
+async def get_portfolio_etag(user_id: str, session: AsyncSession) -> str | None:
+    version = await portfolio_summary_service.get_version(user_id, session)
+    return make_etag('portfolio', user_id, version) if version is not None else None
+
+
+# versioned by the catalog content hash, every catalog listing is a function of the catalog and the query string.
+# None without a catalog, the error response then goes out without an ETag
+def get_catalog_etag(catalog: SchemeCatalog | None) -> str | None:
+    return make_etag('catalog', catalog.version) if catalog is not None else None
+
+
+@investment_router.get('/get-an-investment/{scheme_code}', response_model=InvestmentViewSchema,
+                       status_code=status.HTTP_200_OK)
+async def get_an_investment(scheme_code: int, session: AsyncSession = Depends(get_read_session),
+                            token_details: dict = Depends(access_token_bearer),
+                            if_none_match: str = Header(None)) -> ORJSONResponse:
+    try:
+        user_id = token_details.get('user')['user_id']
+        etag = await get_portfolio_etag(user_id, session)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        investments = await investment_service.get_investment_views_by_user_id(user_id, session, scheme_code)
+
+        if not investments:
+            raise InvestmentNotFound()
+
+        return ORJSONResponse(investments[0], headers=etag_headers(etag))
+    except InvestmentNotFound:
+        handle_error("Investment not found", status_code=404)
+    except SQLAlchemyError as e:
+        handle_error(e, "Database error", status_code=500)
+    except Exception as e:
+        handle_error(e)
+
+
+@investment_router.get('/view-portfolio', response_model=List[InvestmentViewSchema], status_code=status.HTTP_200_OK)
+async def get_portfolio(session: AsyncSession = Depends(get_read_session),
+                        token_details: dict = Depends(access_token_bearer),
+                        if_none_match: str = Header(None)) -> ORJSONResponse:
+    try:
+        user_id = token_details.get('user')['user_id']
+        # read before the holdings, from the same session, so a stale ETag never labels a newer body
+        etag = await get_portfolio_etag(user_id, session)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        investments = await investment_service.get_investment_views_by_user_id(user_id, session)
+
+        if not investments:
+            raise InvestmentNotFound()
+
+        # rows already have the InvestmentViewSchema shape, encode them directly instead of validating them again
+        return ORJSONResponse(investments, headers=etag_headers(etag))
+    except InvestmentNotFound:
+        handle_error("No investments found", status_code=404)
+    except SQLAlchemyError as e:
+        handle_error(e, "Database error", status_code=500)
+    except Exception as e:
+        handle_error(e)
+
+
+# totals served from the per-user aggregate row instead of summing the whole portfolio client side
+@investment_router.get('/portfolio-summary', response_model=PortfolioSummarySchema, status_code=status.HTTP_200_OK)
+async def get_portfolio_summary(response: Response, session: AsyncSession = Depends(get_session),
+                                token_details: dict = Depends(access_token_bearer),
+                                if_none_match: str = Header(None)) -> dict:
+    try:
+        user_id = token_details.get('user')['user_id']
+        etag = await get_portfolio_etag(user_id, session)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        if etag:
+            response.headers.update(etag_headers(etag))
+        return await portfolio_summary_service.get_summary(user_id, session)
+    except SQLAlchemyError as e:
+        handle_error(e, "Database error", status_code=500)
+    except Exception as e:
+        handle_error(e)
+
+
+@investment_router.post('', response_model=InvestmentViewSchema, status_code=status.HTTP_201_CREATED)
+async def create_an_investment(investment_data: InvestmentCreateSchema, session: AsyncSession = Depends(get_session),
+                               token_details: dict = Depends(access_token_bearer)) -> dict:
+    try:
+        user_id = token_details.get('user')['user_id']
+        existing_investment = await investment_service.get_investment_by_user_id_scheme_code(
+            user_id, investment_data.scheme_code, session
+        )
+
+        if existing_investment:
+            raise SchemeCodeAlreadyExists()
+
+        investment = await investment_service.create_an_investment(investment_data, user_id, session)
+        return investment
+    # a concurrent create for the same scheme trips the unique (user_id, scheme_code) index
+    except (SchemeCodeAlreadyExists, IntegrityError):
+        handle_error("Scheme code already exists", status_code=400)
+    except SQLAlchemyError as e:
+        handle_error(e, "Database error", status_code=500)
+    except Exception as e:
+        handle_error(e)
+
+
+async def import_investment_rows(rows: list, token_details: dict, session: AsyncSession) -> dict:
+    if len(rows) > config_obj.BULK_IMPORT_MAX_ROWS:
+        handle_error(None, f"At most {config_obj.BULK_IMPORT_MAX_ROWS} rows can be imported at once", status_code=413)
+
+    try:
+        user_id = token_details.get('user')['user_id']
+        data = await investment_service.import_investments(rows, user_id, session)
+        return {"message": f"{data['created']} of {data['total']} investments imported", "data": data}
+    # a concurrent create for one of the schemes trips the unique (user_id, scheme_code) index
+    except IntegrityError as e:
+        handle_error(e, "Scheme code already exists", status_code=409)
+    except SQLAlchemyError as e:
+        handle_error(e, "Database error", status_code=500)
+    except Exception as e:
+        handle_error(e)
+
+
+# rows are validated one by one, invalid and duplicate rows are reported per row instead of failing the import
+@investment_router.post('/bulk-import', status_code=status.HTTP_200_OK)
+async def bulk_import_investments(rows: List[dict] = Body(...), session: AsyncSession = Depends(get_session),
+                                  token_details: dict = Depends(access_token_bearer)) -> dict:
+    return await import_investment_rows(rows, token_details, session)
+
+
+@investment_router.post('/bulk-import/csv', status_code=status.HTTP_200_OK)
+async def bulk_import_investments_csv(file: UploadFile = File(...), session: AsyncSession = Depends(get_session),
+                                      token_details: dict = Depends(access_token_bearer)) -> dict:
+    try:
+        # read from the spooled upload instead of file.read(), an oversized file is rejected after max rows + 1
+        rows = await asyncio.to_thread(
+            investment_service.read_investment_csv, file.file, config_obj.BULK_IMPORT_MAX_ROWS
+        )
+    except (UnicodeDecodeError, csv.Error) as e:
+        handle_error(e, "Invalid CSV file", status_code=400)
+    return await import_investment_rows(rows, token_details, session)
+
+
+@investment_router.patch('', response_model=InvestmentViewSchema, status_code=status.HTTP_200_OK)
+async def update_an_investment(investment_data: InvestmentUpdateSchema, session: AsyncSession = Depends(get_session),
+                               token_details: dict = Depends(access_token_bearer)) -> dict:
+    try:
+        user_id = token_details.get('user')['user_id']
+        investment = await investment_service.update_an_investment(user_id, investment_data, session)
+
+        if not investment:
+            raise InvestmentNotFound()
+
+        return investment
+    except InvestmentNotFound:
+        handle_error("Investment not found", status_code=404)
+    except SQLAlchemyError as e:
+        handle_error(e, "Database error", status_code=500)
+    except Exception as e:
+        handle_error(e)
+
+
+@investment_router.delete('/delete-an-investment/{scheme_code}', status_code=status.HTTP_204_NO_CONTENT)
+async def delete_an_investment(scheme_code: int, session: AsyncSession = Depends(get_session),
+                               token_details: dict = Depends(access_token_bearer)) -> None:
+    try:
+        user_id = token_details.get('user')['user_id']
+        investment = await investment_service.delete_an_investment(user_id, scheme_code, session)
+
+        if not investment:
+            raise InvestmentNotFound()
+    except InvestmentNotFound:
+        handle_error("Investment not found", status_code=404)
+    except SQLAlchemyError as e:
+        handle_error(e, "Database error", status_code=500)
+    except Exception as e:
+        handle_error(e)
+
+
+# unknown field names are a 400, not an empty projection. Not checked without a catalog, that listing
+# answers with its error body
+def parse_fields(fields: str | None, catalog: SchemeCatalog | None) -> list | None:
+    if not fields:
+        return None
+    fields = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown_fields = [field for field in fields if catalog is not None and field not in catalog.fields]
+    if unknown_fields:
+        handle_error(None, f"Unknown fields: {', '.join(unknown_fields)}", status_code=400)
+    return fields or None
+
+
+# without cursor/limit the whole universe is returned as before, with them the listing is paginated
+@investment_router.get('/get-json-data-RapidAPI', status_code=status.HTTP_200_OK)
+async def get_RapidAPI_data_from_API(token_details: dict = Depends(access_token_bearer), cursor: int = None,
+                                     limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE), fields: str = None,
+                                     if_none_match: str = Header(None), accept_encoding: str = Header(None)):
+    try:
+        catalog = await investment_service.get_catalog_or_none()
+        etag = get_catalog_etag(catalog)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        if cursor is None and limit is None:
+            if fields is None:
+                body = await investment_service.get_funds_body(catalog, "Data fetched successfully")
+                return await precompressed_json_response(body, accept_encoding, headers=etag_headers(etag))
+            data = await investment_service.get_funds_from_RapidAPI(catalog, parse_fields(fields, catalog))
+            return ORJSONResponse({"message": "Data fetched successfully", "data": data}, headers=etag_headers(etag))
+
+        # pages have no error body, a failed load is an error response
+        if catalog is None:
+            handle_error(None, "Failed to fetch data from RapidAPI", status_code=502)
+        data, next_cursor = await investment_service.get_funds_page(
+            catalog, cursor, limit or 100, parse_fields(fields, catalog)
+        )
+        return ORJSONResponse({"message": "Data fetched successfully", "data": data, "next_cursor": next_cursor},
+                              headers=etag_headers(etag))
+    except HTTPException:
+        raise
+    except requests.RequestException as e:
+        handle_error(e, "Failed to fetch data from RapidAPI", status_code=502)
+    except Exception as e:
+        handle_error(e)
+
+
+@investment_router.get('/get-json-data-RapidAPI/stream', status_code=status.HTTP_200_OK)
+async def stream_RapidAPI_data_from_API(token_details: dict = Depends(access_token_bearer), fields: str = None,
+                                        if_none_match: str = Header(None)):
+    try:
+        catalog = await investment_service.get_catalog()
+        etag = get_catalog_etag(catalog)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        schemes = await investment_service.iter_funds(catalog, parse_fields(fields, catalog))
+    except HTTPException:
+        raise
+    except requests.RequestException as e:
+        handle_error(e, "Failed to fetch data from RapidAPI", status_code=502)
+    except Exception as e:
+        handle_error(e)
+
+    # one JSON document per line, sent in chunks of about NDJSON_CHUNK_SIZE as the records are produced
+    async def ndjson_lines():
+        chunk = bytearray()
+        for scheme in schemes:
+            chunk += orjson.dumps(scheme)
+            chunk += b"\n"
+            if len(chunk) >= NDJSON_CHUNK_SIZE:
+                yield bytes(chunk)
+                chunk.clear()
+        if chunk:
+            yield bytes(chunk)
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson", headers=etag_headers(etag))
+
+
+@investment_router.get('/search-schemes', status_code=status.HTTP_200_OK)
+async def search_schemes(q: str = Query(..., min_length=1, max_length=100),
+                         limit: int = Query(10, ge=1, le=MAX_SEARCH_RESULTS), fields: str = None,
+                         token_details: dict = Depends(access_token_bearer), if_none_match: str = Header(None)):
+    try:
+        catalog = await investment_service.get_catalog()
+        etag = get_catalog_etag(catalog)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        data = await investment_service.search_funds(catalog, q, limit, parse_fields(fields, catalog))
+        return ORJSONResponse({"message": "Schemes retrieved successfully", "data": data}, headers=etag_headers(etag))
+    except HTTPException:
+        raise
+    except requests.RequestException as e:
+        handle_error(e, "Failed to search schemes", status_code=502)
+    except Exception as e:
+        handle_error(e)
+
+
+@investment_router.get('/get-all-fund-families', status_code=status.HTTP_200_OK)
+async def get_RapidAPI_fund_families(token_details: dict = Depends(access_token_bearer), if_none_match: str = Header(None),
+                                     accept_encoding: str = Header(None)):
+    try:
+        catalog = await investment_service.get_catalog_or_none()
+        etag = get_catalog_etag(catalog)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        body = await investment_service.get_famity_funds_from_RapidAPI(catalog, "Fund families retrieved successfully")
+        return await precompressed_json_response(body, accept_encoding, headers=etag_headers(etag))
+    except requests.RequestException as e:
+        handle_error(e, "Failed to fetch fund families", status_code=502)
+    except Exception as e:
+        handle_error(e)
+
+
+@investment_router.get('/get-fund-family-open-funds', status_code=status.HTTP_200_OK)
+async def get_RapidAPI_fund_families(token_details: dict = Depends(access_token_bearer), fund_family: str = None,
+                                     if_none_match: str = Header(None), accept_encoding: str = Header(None)):
+    try:
+        catalog = await investment_service.get_catalog_or_none()
+        etag = get_catalog_etag(catalog)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        body = await investment_service.get_open_funds_by_family(
+            catalog, fund_family, "Open funds retrieved successfully"
+        )
+        return await precompressed_json_response(body, accept_encoding, headers=etag_headers(etag))
+    except requests.RequestException as e:
+        handle_error(e, "Failed to fetch open funds", status_code=502)
+    except Exception as e:
+        handle_error(e)
+
+# update nav of all the investments
+@investment_router.post('/update-all-navs', status_code=status.HTTP_200_OK)
+async def update_all_navs_hourly(session: AsyncSession = Depends(get_session), mode: Literal['normalized', 'bulk', 'orm'] = None):
+    is_update_done = await investment_service.update_nav_for_all_investments(session, mode)
     return is_update_done
\ No newline at end of file
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, status
+from src.clients.investment_client import get_http_pool_stats, get_snapshot_stats
+from src.services.catalog_service import catalog_service
+from src.services.utils import get_password_hash_stats
+from src.services.authorization_service import verified_token_cache
+
+stats_router = APIRouter()
+
+
+@stats_router.get('/http-pool', status_code=status.HTTP_200_OK)
+async def get_http_pool_details():
+    return {"message": "HTTP pool stats retrieved successfully", "data": get_http_pool_stats()}
+
+
+@stats_router.get('/rapid-api-snapshot', status_code=status.HTTP_200_OK)
+async def get_rapid_api_snapshot_details():
+    return {"message": "RapidAPI snapshot stats retrieved successfully", "data": get_snapshot_stats()}
+
+
+@stats_router.get('/catalog', status_code=status.HTTP_200_OK)
+async def get_catalog_details():
+    return {"message": "Catalog stats retrieved successfully", "data": catalog_service.get_stats()}
+
+
+@stats_router.get('/password-hashing', status_code=status.HTTP_200_OK)
+async def get_password_hashing_details():
+    return {"message": "Password hashing stats retrieved successfully", "data": get_password_hash_stats()}
+
+
+@stats_router.get('/token-cache', status_code=status.HTTP_200_OK)
+async def get_token_cache_details():
+    return {"message": "Token cache stats retrieved successfully", "data": verified_token_cache.get_stats()}
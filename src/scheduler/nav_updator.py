@@ -1,7 +1,16 @@
+import asyncio
+import time
+from datetime import datetime
+
 from celery.schedules import crontab
-from celery import Celery
-import requests
+from celery.signals import worker_init
+from celery import Celery, chord, group
+from sqlalchemy.exc import SQLAlchemyError
 from config import config_obj
+from src.clients.investment_client import start_http_client, close_http_client
+from src.metrics import start_worker_metrics_server
+from src.models.db_engine import create_task_session_maker
+from src.services.investment_service import InvestmentService, new_nav_run_stats
 
 c_app = Celery("celery", broker=config_obj.REDIS_URL, backend=config_obj.REDIS_URL, broker_connection_retry_on_startup=True)
 c_app.config_from_object(config_obj)
@@ -16,17 +25,94 @@ c_app.conf.beat_schedule = {
 
 c_app.conf.timezone = "UTC"
 
-# API URL for NAV updates
-API_URL = f"http://localhost:8000/mfb/investment/update-all-navs"
+investment_service = InvestmentService()
+
+
+# the shard tasks record the NAV refresh metrics in the worker, not in the API process, so the worker serves them
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    if config_obj.CELERY_METRICS_PORT is not None:
+        start_worker_metrics_server(config_obj.CELERY_METRICS_PORT)
+
+# shard counters added up by the aggregation step
+SHARD_COUNTERS = ('schemes_total', 'schemes_changed', 'schemes_skipped', 'investments', 'schemes_written',
+                  'summaries_updated', 'batches', 'commits')
+
+
+# a scheme and all of its holdings always land in the same shard, so shards never write the same rows
+def shard_scheme_navs(scheme_navs: list, shard_count: int) -> dict:
+    shards = {}
+    for params in scheme_navs:
+        shards.setdefault(params['b_scheme_code'] % shard_count, []).append(
+            [params['b_scheme_code'], params['b_nav'], params['b_date'].isoformat()]
+        )
+    return shards
+
+
+async def resolve_latest_navs(mode: str = None) -> tuple[list, dict]:
+    run_stats = new_nav_run_stats(mode)
+    engine, task_session_maker = create_task_session_maker()
+    await start_http_client()
+    try:
+        async with task_session_maker() as session:
+            scheme_navs = await investment_service.resolve_latest_navs(run_stats, session)
+    finally:
+        await close_http_client()
+        await engine.dispose()
+    return scheme_navs, run_stats
+
 
-@c_app.task(name="src.scheduler.nav_updator.fetch_investments", autoretry_for=(requests.RequestException,), retry_kwargs={"max_retries": 3, "countdown": 60})
-def fetch_investments():
+async def apply_nav_updates(scheme_navs: list, mode: str = None) -> dict:
+    engine, task_session_maker = create_task_session_maker()
     try:
-        response = requests.post(API_URL, timeout=15)
-        response.raise_for_status()
-        nav_data = response.json()
-        return nav_data
-    except requests.RequestException as req_err:
-        raise fetch_investments.retry(exc=req_err)
-    except Exception as unexpected_err:
-        raise unexpected_err
\ No newline at end of file
+        async with task_session_maker() as session:
+            return await investment_service.apply_nav_updates(scheme_navs, session, mode)
+    finally:
+        await engine.dispose()
+
+
+# coordinator: download the scheme universe once, then fan the writes out to shard tasks
+@c_app.task(name="src.scheduler.nav_updator.fetch_investments")
+def fetch_investments(mode: str = None):
+    started_at = time.time()
+    scheme_navs, run_stats = asyncio.run(resolve_latest_navs(mode))
+
+    shards = shard_scheme_navs(scheme_navs, max(config_obj.NAV_UPDATE_SHARDS, 1))
+    if not shards:
+        return {'message': 'No investments to update.', 'stats': run_stats}
+
+    header = group(update_nav_shard.s(shard, shard_navs, run_stats['mode']) for shard, shard_navs in sorted(shards.items()))
+    chord(header)(aggregate_nav_shards.s(run_stats, started_at))
+    return {'message': f'NAV update dispatched to {len(shards)} shards.', 'stats': run_stats}
+
+
+@c_app.task(name="src.scheduler.nav_updator.update_nav_shard", autoretry_for=(SQLAlchemyError,), retry_kwargs={"max_retries": 3, "countdown": 10})
+def update_nav_shard(shard: int, shard_navs: list, mode: str = None):
+    scheme_navs = [
+        {'b_scheme_code': scheme_code, 'b_nav': nav, 'b_date': datetime.fromisoformat(date)}
+        for scheme_code, nav, date in shard_navs
+    ]
+    result = asyncio.run(apply_nav_updates(scheme_navs, mode))
+    return {'shard': shard, 'schemes': len(scheme_navs), 'stats': result['stats']}
+
+
+@c_app.task(name="src.scheduler.nav_updator.aggregate_nav_shards")
+def aggregate_nav_shards(shard_results: list, run_stats: dict, started_at: float):
+    run_stats = dict(run_stats)
+    for shard_result in shard_results:
+        for counter in SHARD_COUNTERS:
+            run_stats[counter] += shard_result['stats'][counter]
+
+    run_stats['shards'] = [
+        {'shard': shard_result['shard'], 'schemes': shard_result['schemes'], 'elapsed_ms': shard_result['stats']['elapsed_ms']}
+        for shard_result in sorted(shard_results, key=lambda shard_result: shard_result['shard'])
+    ]
+    run_stats['slowest_shard_ms'] = max(shard['elapsed_ms'] for shard in run_stats['shards'])
+    # wall time from the coordinator start, including queueing of the shard tasks
+    run_stats['elapsed_ms'] = round((time.time() - started_at) * 1000, 2)
+    print(f"Done updating investments every hour... {run_stats}")
+
+    return {
+        'message': 'All NAVs have been updated successfully.',
+        'stats': run_stats
+    }
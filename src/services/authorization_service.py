@@ -1,16 +1,23 @@
+import time
+import hashlib
 from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
-from src.services.utils import decode_access_token
+from config import config_obj
+from src.services.cache_service import TTLCache
+from src.services.utils import decode_access_token, is_well_formed_token, ACCESS_TOKEN_EXPIRY
 from fastapi import Request, Depends
 from src.services.user_service import UserService
 from src.errors import InvalidToken, AccessTokenRequired
-from src.models.db_engine import get_session
+from src.models.db_engine import get_read_session
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from src.views.user_schema import UserInvestmentSchemaView
 from src.errors import UserNotFound
 
 user_service = UserService()
 
+# verified claims keyed by token digest, each entry expires together with its token
+verified_token_cache = TTLCache(maxsize=config_obj.TOKEN_CACHE_MAXSIZE, ttl=ACCESS_TOKEN_EXPIRY)
+
 class TokenBearer(HTTPBearer):
 
     def __init__(self, auto_error=True):
@@ -20,16 +27,34 @@ class TokenBearer(HTTPBearer):
 
         creds = await super().__call__(request)
         token = creds.credentials
-        token_data = decode_access_token(token)
+        token_data = self.decode_token(token)
 
-        if not self.token_valid(token):
+        if token_data is None:
             raise InvalidToken()
         self.verify_token_data(token_data)
         return token_data
 
-    def token_valid(self, token: str) -> bool:
+    def decode_token(self, token: str) -> dict | None:
+        token_digest = hashlib.sha256(token.encode()).digest()
+        token_data = verified_token_cache.get(token_digest)
+        if token_data is not None:
+            return token_data
+
+        # reject garbage before paying for signature verification
+        if not is_well_formed_token(token):
+            return None
+
         token_data = decode_access_token(token)
-        return token_data is not None
+        if token_data is None:
+            return None
+
+        ttl = token_data.get('exp', 0) - time.time()
+        if ttl > 0:
+            verified_token_cache.set(token_digest, token_data, ttl=ttl)
+        return token_data
+
+    def token_valid(self, token: str) -> bool:
+        return self.decode_token(token) is not None
 
     def verify_token_data(self, token_data):
         raise NotImplementedError(
@@ -42,9 +67,9 @@ class AccessTokenBearer(TokenBearer):
 
 access_token_bearer = AccessTokenBearer()
 
-async def get_current_user(token_details: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_session)) -> UserInvestmentSchemaView:
+async def get_current_user(token_details: dict = Depends(access_token_bearer), session: AsyncSession = Depends(get_read_session)) -> UserInvestmentSchemaView:
     user_email = token_details['user']['email']
-    user = await user_service.get_user_by_email(user_email, session)
+    user = await user_service.get_user_by_email(user_email, session, with_investments=True)
     if not user:
         raise UserNotFound()
     return user
\ No newline at end of file
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries expire after a TTL.
+
+    get_or_load is single-flight: concurrent misses on the same key share one loader call, which runs in
+    its own task and outlives any one cancelled caller.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'evictions': 0,
+            'expirations': 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.peek(key, _MISSING)
+        if value is _MISSING:
+            self.stats['misses'] += 1
+            return default
+
+        self.stats['hits'] += 1
+        return value
+
+    # lookup without touching the hit/miss counters
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.stats['expirations'] += 1
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    # every held value, expired ones included until a lookup or an eviction drops them
+    def values(self) -> list:
+        return [value for _, value in self._entries.values()]
+
+    def invalidate(self, key: Hashable = _MISSING) -> None:
+        if key is _MISSING:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.peek(key, _MISSING)
+        if value is not _MISSING:
+            self.stats['hits'] += 1
+            return value
+
+        # someone is already loading this key, wait for their result instead of calling upstream again
+        load = self._inflight.get(key)
+        if load is not None:
+            self.stats['coalesced'] += 1
+        else:
+            self.stats['misses'] += 1
+            # the load runs in its own task, so a caller that is cancelled or times out
+            # does not cancel it for the others waiting on the same key
+            load = asyncio.ensure_future(loader())
+            self._inflight[key] = load
+            load.add_done_callback(lambda done: self._finish_load(key, done))
+        return await asyncio.shield(load)
+
+    # runs before any waiter resumes, so they all find the value cached
+    def _finish_load(self, key: Hashable, load: asyncio.Future) -> None:
+        del self._inflight[key]
+        if load.cancelled():
+            return
+        # also marks the exception as retrieved in case every caller was cancelled
+        if load.exception() is None:
+            self.set(key, load.result())
+
+    def get_stats(self) -> dict:
+        lookups = self.stats['hits'] + self.stats['misses'] + self.stats['coalesced']
+        return {
+            **self.stats,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'inflight': len(self._inflight),
+            'hit_ratio': round((self.stats['hits'] + self.stats['coalesced']) / lookups, 4) if lookups else 0.0,
+        }
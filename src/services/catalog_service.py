@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Callable, Hashable, Iterator
+
+import orjson
+
+from config import config_obj
+from src.clients.investment_client import get_openended_schemes
+from src.compression import PrecompressedBody
+from src.services.cache_service import TTLCache
+from src.services.search_service import SchemeSearchIndex
+
+CODE_FIELD = "Scheme_Code"
+NAV_FIELD = "Net_Asset_Value"
+DATE_FIELD = "Date"
+FAMILY_FIELD = "Mutual_Fund_Family"
+
+# marks a field a record did not have, so rows round-trip to the same keys
+_MISSING = object()
+_MISSING_MARKER = '\x00missing'
+
+
+def _encode_missing(value):
+    if value is _MISSING:
+        return _MISSING_MARKER
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class SchemeRow:
+    """Read-only view of one catalog row, indexed like the RapidAPI record it was built from."""
+
+    __slots__ = ('_catalog', '_position')
+
+    def __init__(self, catalog: 'SchemeCatalog', position: int):
+        self._catalog = catalog
+        self._position = position
+
+    def __getitem__(self, field: str):
+        value = self._catalog.value(self._position, field)
+        if value is _MISSING:
+            raise KeyError(field)
+        return value
+
+    def __contains__(self, field: str) -> bool:
+        return self._catalog.value(self._position, field) is not _MISSING
+
+    def get(self, field: str, default=None):
+        value = self._catalog.value(self._position, field)
+        return default if value is _MISSING else value
+
+    def to_dict(self, fields: list = None) -> dict:
+        record = {}
+        for field in fields or self._catalog.fields:
+            value = self._catalog.value(self._position, field)
+            if value is not _MISSING:
+                record[field] = value
+        return record
+
+
+class SchemeCatalog:
+    """
+    Snapshot of the open-ended scheme universe, stored column by column in scheme code order.
+
+    Scheme codes and NAVs live in typed arrays. Repetitive fields (fund family, category, date) are dictionary
+    encoded: each distinct value is kept once and rows hold its index in an array. Lookups binary search the code array
+    and hand out SchemeRow views, dicts are only built for what a response returns.
+    Built once per catalog refresh and never mutated afterwards.
+    """
+
+    def __init__(self, schemes: list):
+        self.built_at = datetime.now()
+
+        ordered = sorted(schemes, key=lambda scheme: scheme[CODE_FIELD])
+        self.fields = list(dict.fromkeys(field for scheme in ordered for field in scheme))
+        self._columns = {field: self._encode_column([scheme.get(field, _MISSING) for scheme in ordered]) for field in self.fields}
+        self._complete = all(_MISSING not in self._column_values(field) for field in self.fields)
+        # hash of the content, equal across refreshes and worker processes while RapidAPI returns the same data
+        self.version = self._content_version()
+
+        # scheme codes in ascending order, the pagination cursor is the last code a page returned
+        self.scheme_codes = self._columns[CODE_FIELD][1] if ordered else array('q')
+
+        self._family_positions = {}
+        for position, family in enumerate(self.materialize(FAMILY_FIELD) if FAMILY_FIELD in self._columns else ()):
+            self._family_positions.setdefault(family, array('I')).append(position)
+        self.families = sorted(family for family in self._family_positions if isinstance(family, str))
+
+        self.search_index = SchemeSearchIndex([SchemeRow(self, position) for position in range(len(ordered))])
+
+        # compressed response bodies, one per listing at most: the universe from two endpoints (their messages
+        # differ, and a message cannot be spliced into a compressed body), the families and each family
+        self._payloads = TTLCache(maxsize=len(self.families) + 3, ttl=config_obj.CATALOG_CACHE_TTL)
+
+    @staticmethod
+    def _encode_column(values: list) -> tuple:
+        if all(type(value) is int for value in values):
+            try:
+                return 'int', array('q', values), None
+            except OverflowError:
+                pass
+        if all(type(value) in (int, float) for value in values):
+            return 'float', array('d', values), None
+
+        encoding = {}
+        try:
+            ids = array('I', [encoding.setdefault(value, len(encoding)) for value in values])
+        except TypeError:
+            # unhashable values (nested objects) are kept as they are
+            return 'list', values, None
+        # mostly distinct values (names, ISINs) are cheaper as a plain list than as ids plus a dictionary
+        if len(encoding) * 2 > len(values):
+            return 'list', values, None
+        return 'dict', ids, list(encoding)
+
+    def _content_version(self) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for field in self.fields:
+            kind, data, values = self._columns[field]
+            digest.update(orjson.dumps([field, kind]))
+            digest.update(orjson.dumps(data, default=_encode_missing) if kind == 'list' else data.tobytes())
+            if values is not None:
+                digest.update(orjson.dumps(values, default=_encode_missing))
+        return digest.hexdigest()
+
+    def _column_values(self, field: str):
+        kind, data, values = self._columns[field]
+        return values if kind == 'dict' else data
+
+    def __len__(self) -> int:
+        return len(self.scheme_codes)
+
+    def value(self, position: int, field: str):
+        column = self._columns.get(field)
+        if column is None:
+            return _MISSING
+        kind, data, values = column
+        return values[data[position]] if kind == 'dict' else data[position]
+
+    # one field for every row, in code order
+    def materialize(self, field: str) -> list:
+        kind, data, values = self._columns[field]
+        return [values[value_id] for value_id in data] if kind == 'dict' else list(data)
+
+    def find(self, scheme_code: int) -> int | None:
+        position = bisect_left(self.scheme_codes, scheme_code)
+        if position < len(self.scheme_codes) and self.scheme_codes[position] == scheme_code:
+            return position
+        return None
+
+    # (nav, date) straight from the columns, what the NAV refresh needs without building a record
+    def get_nav(self, scheme_code: int) -> tuple[float, str] | None:
+        position = self.find(scheme_code)
+        if position is None:
+            return None
+        nav = self.value(position, NAV_FIELD)
+        if nav is _MISSING or nav is None:
+            return None
+        return nav, self.value(position, DATE_FIELD)
+
+    def get_family_schemes(self, fund_family: str) -> list:
+        return [SchemeRow(self, position).to_dict() for position in self._family_positions.get(fund_family, ())]
+
+    def search(self, query: str, limit: int = 10, fields: list = None) -> list:
+        return [scheme.to_dict(fields) for scheme in self.search_index.search(query, limit)]
+
+    def page(self, cursor: int = None, limit: int = 100, fields: list = None) -> tuple[list, int | None]:
+        start = bisect_right(self.scheme_codes, cursor) if cursor is not None else 0
+        end = min(start + limit, len(self.scheme_codes))
+        schemes = [SchemeRow(self, position).to_dict(fields) for position in range(start, end)]
+
+        next_cursor = self.scheme_codes[end - 1] if schemes and end < len(self.scheme_codes) else None
+        return schemes, next_cursor
+
+    def iter_schemes(self, fields: list = None) -> Iterator[dict]:
+        for position in range(len(self)):
+            yield SchemeRow(self, position).to_dict(fields)
+
+    # every row as a record dict, built column-wise for full listings. Unknown fields are skipped like
+    # to_dict does, so fields the catalog does not have at all give one empty record per scheme
+    def to_dicts(self, fields: list = None) -> list:
+        fields = [field for field in fields if field in self._columns] if fields else self.fields
+        if not fields:
+            return [{} for _ in range(len(self))]
+        rows = zip(*(self.materialize(field) for field in fields))
+        if self._complete:
+            return [dict(zip(fields, row)) for row in rows]
+        return [{field: value for field, value in zip(fields, row) if value is not _MISSING} for row in rows]
+
+    # response body of build(), encoded and compressed once per catalog in a worker thread,
+    # concurrent first requests share the work
+    async def payload(self, key: Hashable, build: Callable[[], Any]) -> PrecompressedBody:
+        return await self._payloads.get_or_load(key, lambda: asyncio.to_thread(self._encode_payload, build))
+
+    @staticmethod
+    def _encode_payload(build: Callable[[], Any]) -> PrecompressedBody:
+        levels = {'br': config_obj.CATALOG_BROTLI_QUALITY, 'gzip': config_obj.CATALOG_GZIP_LEVEL}
+        return PrecompressedBody(orjson.dumps(build()), levels, config_obj.COMPRESSION_MINIMUM_SIZE)
+
+    def has_family(self, fund_family: str) -> bool:
+        return fund_family in self._family_positions
+
+    def get_payload_stats(self) -> dict:
+        return {**self._payloads.get_stats(), 'bytes': sum(payload.nbytes for payload in self._payloads.values())}
+
+
+class CatalogService:
+    CACHE_KEY = 'catalog'
+
+    def __init__(self):
+        self._cache = TTLCache(maxsize=1, ttl=config_obj.CATALOG_CACHE_TTL)
+
+    async def get_catalog(self) -> SchemeCatalog:
+        return await self._cache.get_or_load(self.CACHE_KEY, self._build_catalog)
+
+    # download a fresh universe and swap it in, used by the NAV refresh
+    async def refresh_catalog(self) -> SchemeCatalog:
+        catalog = await self._build_catalog()
+        self._cache.set(self.CACHE_KEY, catalog)
+        return catalog
+
+    # drop the current catalog, the next request downloads a new one
+    def invalidate(self):
+        self._cache.invalidate(self.CACHE_KEY)
+
+    async def _build_catalog(self) -> SchemeCatalog:
+        schemes = await get_openended_schemes()
+        # encoding the columns and the search index takes a while for the full universe, keep it off the event loop
+        return await asyncio.to_thread(SchemeCatalog, schemes)
+
+    def get_stats(self) -> dict:
+        catalog = self._cache.peek(self.CACHE_KEY)
+        return {
+            'schemes': len(catalog) if catalog else 0,
+            'families': len(catalog.families) if catalog else 0,
+            'built_at': catalog.built_at.isoformat() if catalog else None,
+            'version': catalog.version if catalog else None,
+            'payloads': catalog.get_payload_stats() if catalog else None,
+            'cache': self._cache.get_stats(),
+        }
+
+
+catalog_service = CatalogService()
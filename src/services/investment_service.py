@@ -1,140 +1,518 @@
-from datetime import datetime
-
-from sqlalchemy.ext.asyncio import AsyncSession
-from src.clients.investment_client import get_openended_schemes_codes, get_fund_list_RapidAPI
-from src.views.investment_schema import InvestmentCreateSchema, InvestmentUpdateSchema
-from src.models.db_models import Investment
-from sqlmodel import select, desc, and_
-
-
-class InvestmentService:
-
-    async def get_all_investments(self, session: AsyncSession):
-        statement = select(Investment).order_by(desc(Investment.created_at))
-        result = await session.exec(statement)
-        return result.all()
-
-    async def get_investment_by_user_id_scheme_code(self, user_id: str, scheme_code: int, session: AsyncSession):
-        statement = select(Investment).where(and_(Investment.user_id == user_id, Investment.scheme_code == scheme_code)).order_by(desc(Investment.created_at))
-        result = await session.exec(statement)
-        return result.first()
-
-    async def get_investments_by_user_id(self, user_id: str, session: AsyncSession):
-        statement = select(Investment).where(and_(Investment.user_id == user_id)).order_by(desc(Investment.created_at))
-        result = await session.exec(statement)
-        return result.all()
-
-    async def create_an_investment(self, investment_data: InvestmentCreateSchema, user_id: str, session: AsyncSession):
-
-        investment_data_dict = investment_data.model_dump()
-        print(f"investment details: {str(investment_data_dict)}")
-        investment = Investment(**investment_data_dict)
-        investment.user_id = user_id
-
-        # add to the db
-        session.add(investment)
-        await session.commit()
-        await session.refresh(investment)
-
-        return investment
-
-    # update an investment, allowed only for units
-    async def update_an_investment(self, user_id: str, investment_data: InvestmentUpdateSchema, session: AsyncSession):
-
-        # get the investment details
-        investment = await self.get_investment_by_user_id_scheme_code(user_id, investment_data.scheme_code, session)
-
-        # if investment not found
-        if not investment:
-            return None
-
-        # convert investment data into a dictionary
-        investment_data_dict = investment_data.model_dump()
-
-        # update the attributes
-        for key, value in investment_data_dict.items():
-            setattr(investment, key, value)
-
-        await session.commit()
-        await session.refresh(investment)
-
-        return investment
-
-    # delete an investment
-    async def delete_an_investment(self, user_id: str, scheme_code: str, session: AsyncSession):
-        # get the investment details
-        investment = await self.get_investment_by_user_id_scheme_code(user_id, scheme_code, session)
-
-        # if investment not found
-        if not investment:
-            return None
-
-        # delete the investment from db
-        await session.delete(investment)
-        await session.commit()
-        return investment
-
-    # update all nav values of investments
-    async def update_nav_for_all_investments(self, session: AsyncSession):
-
-        # get all investments
-        investments = await self.get_all_investments(session)
-
-        # update the current nav value and current_value of units
-        try:
-            for investment in investments:
-                latest_mutual_fund_info = await get_openended_schemes_codes(investment.scheme_code)
-                date_ = datetime.strptime(latest_mutual_fund_info['Date'], "%d-%b-%Y")
-                investment.date = date_.strftime("%Y-%m-%d")
-                investment.nav = round((latest_mutual_fund_info['Net_Asset_Value']), 4)
-                investment.current_value = round((latest_mutual_fund_info['Net_Asset_Value'] * investment.units), 4)
-                session.add(investment)
-
-            await session.commit()
-
-            print("Done updating investments every hour...")
-
-            return {
-                'message': 'All NAVs have been updated successfully.'
-            }
-        except Exception as e:
-            print(f"Exception occurred while updating the NAV details: {str(e)}")
-            return {
-                'message': 'Update not successful'
-            }
-
-
-    async def get_funds_from_RapidAPI(self):
-        try:
-            queries = {}
-            data = await get_fund_list_RapidAPI(queries)
-            return data
-        except Exception as e:
-            print(f"Error reading JSON from file: {str(e)}")
-            return {
-                "message" : "Error while fetching"
-            }
-
-    async def get_famity_funds_from_RapidAPI(self):
-        try:
-            queries = {}
-            data = await get_fund_list_RapidAPI(queries)
-
-            family_funds = list(set([item["Mutual_Fund_Family"] for item in data['data']]))
-            return family_funds
-        except Exception as e:
-            print(f"Error reading JSON from file: {str(e)}")
-            return {
-                "message" : "Error while fetching"
-            }
-
-    async def get_open_funds_by_family(self, fund_family):
-        try:
-            queries = {"Mutual_Fund_Family" : fund_family}
-            data = await get_fund_list_RapidAPI(queries)
-            return data
-        except Exception as e:
-            print(f"Error reading JSON from file: {str(e)}")
-            return {
-                "message" : "Error while fetching"
-            }
+import codecs
+import csv
+import math
+import time
+import uuid
+from datetime import datetime
+from itertools import islice
+from typing import BinaryIO
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import insert, update, bindparam, func, Float
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import config_obj
+from src.metrics import observe_nav_refresh
+from src.compression import PrecompressedBody
+from src.services.catalog_service import catalog_service, SchemeCatalog
+from src.services.portfolio_service import portfolio_summary_service, chunked
+from src.views.investment_schema import InvestmentCreateSchema, InvestmentUpdateSchema, investment_row_view
+from src.models.db_models import Investment, SchemeNav
+from sqlmodel import select, desc, and_
+
+NAV_UPDATE_MODES = ('normalized', 'bulk', 'orm')
+
+INVESTMENT_VIEW_COLUMNS = (
+    Investment.investment_id, Investment.scheme_name, Investment.scheme_code, Investment.units, Investment.nav,
+    Investment.date, Investment.current_value, Investment.fund_family,
+    SchemeNav.nav.label('latest_nav'), SchemeNav.date.label('latest_date'),
+)
+
+
+# per-run counters, reported back with the result
+def new_nav_run_stats(mode: str = None) -> dict:
+    mode = mode or config_obj.NAV_UPDATE_MODE
+    if mode not in NAV_UPDATE_MODES:
+        raise ValueError(f"Unknown NAV update mode: {mode}")
+
+    return {'mode': mode, 'downloads': 0, 'lookups': 0, 'missing_schemes': 0, 'schemes_total': 0,
+            'schemes_changed': 0, 'schemes_skipped': 0, 'investments': 0, 'schemes_written': 0,
+            'summaries_updated': 0, 'batches': 0, 'commits': 0, 'elapsed_ms': 0.0}
+
+
+class InvestmentService:
+
+    async def get_all_investments(self, session: AsyncSession):
+        statement = select(Investment).order_by(desc(Investment.created_at))
+        result = await session.exec(statement)
+        return result.all()
+
+    async def get_investment_by_user_id_scheme_code(self, user_id: str, scheme_code: int, session: AsyncSession):
+        statement = select(Investment).where(and_(Investment.user_id == user_id, Investment.scheme_code == scheme_code)).order_by(desc(Investment.created_at))
+        result = await session.exec(statement)
+        return result.first()
+
+    async def get_investments_by_user_id(self, user_id: str, session: AsyncSession):
+        statement = select(Investment).where(and_(Investment.user_id == user_id)).order_by(desc(Investment.created_at))
+        result = await session.exec(statement)
+        return result.all()
+
+    # the response fields as plain columns, read-only endpoints encode these rows without building ORM objects
+    async def get_investment_views_by_user_id(self, user_id: str, session: AsyncSession, scheme_code: int = None) -> list:
+        statement = (
+            select(*INVESTMENT_VIEW_COLUMNS)
+            .outerjoin(SchemeNav, SchemeNav.scheme_code == Investment.scheme_code)
+            .where(Investment.user_id == user_id)
+            .order_by(desc(Investment.created_at))
+        )
+        if scheme_code is not None:
+            statement = statement.where(Investment.scheme_code == scheme_code).limit(1)
+        result = await session.exec(statement)
+        return [investment_row_view(row) for row in result.all()]
+
+    async def create_an_investment(self, investment_data: InvestmentCreateSchema, user_id: str, session: AsyncSession):
+
+        investment_data_dict = investment_data.model_dump()
+        print(f"investment details: {str(investment_data_dict)}")
+        investment = Investment(**investment_data_dict)
+        investment.user_id = user_id
+
+        # add to the db
+        session.add(investment)
+        await session.flush()
+
+        scheme_nav = await portfolio_summary_service.get_scheme_nav(investment.scheme_code, session)
+        await portfolio_summary_service.apply_investment_change(
+            user_id, session, new=portfolio_summary_service.contribution(investment, scheme_nav)
+        )
+        await session.commit()
+        await session.refresh(investment)
+
+        return investment
+
+    # bulk import: one IN (...) query for duplicates, multi-row INSERTs and one commit, with a result per input row
+    async def import_investments(self, rows: list, user_id: str, session: AsyncSession) -> dict:
+
+        results = []
+        valid_rows = []
+        for index, row in enumerate(rows):
+            try:
+                investment_data = InvestmentCreateSchema.model_validate(row)
+            except ValidationError as e:
+                results.append({'index': index, 'status': 'invalid', 'detail': self._validation_detail(e)})
+                continue
+            results.append({'index': index, 'scheme_code': investment_data.scheme_code, 'status': 'duplicate'})
+            valid_rows.append((results[-1], investment_data))
+
+        scheme_codes = {investment_data.scheme_code for _, investment_data in valid_rows}
+        existing_codes = set()
+        scheme_navs = {}
+        if scheme_codes:
+            statement = select(Investment.scheme_code).where(
+                and_(Investment.user_id == user_id, Investment.scheme_code.in_(scheme_codes))
+            )
+            result = await session.exec(statement)
+            existing_codes = set(result.all())
+
+            result = await session.exec(select(SchemeNav.scheme_code, SchemeNav.nav).where(SchemeNav.scheme_code.in_(scheme_codes)))
+            scheme_navs = dict(result.all())
+
+        created_at = datetime.now()
+        values = []
+        deltas = {}
+        for row_result, investment_data in valid_rows:
+            # already held, or repeated earlier in the same import
+            if investment_data.scheme_code in existing_codes:
+                continue
+            existing_codes.add(investment_data.scheme_code)
+
+            investment_id = str(uuid.uuid4())
+            values.append({
+                **investment_data.model_dump(),
+                'investment_id': investment_id,
+                'user_id': user_id,
+                'created_at': created_at,
+                'updated_at': created_at,
+            })
+            row_result.update(status='created', investment_id=investment_id)
+
+            fund_family, invested_value, current_value = portfolio_summary_service.contribution(
+                investment_data, scheme_navs.get(investment_data.scheme_code)
+            )
+            portfolio_summary_service.add_delta(deltas, user_id, fund_family, invested_value, current_value, 1)
+
+        try:
+            for batch in chunked(values, max(config_obj.BULK_IMPORT_BATCH_SIZE, 1)):
+                await session.execute(insert(Investment.__table__).values(batch))
+            await portfolio_summary_service.apply_deltas(deltas, session)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+        return {
+            'total': len(rows),
+            'created': len(values),
+            'duplicates': len(valid_rows) - len(values),
+            'invalid': len(rows) - len(valid_rows),
+            'results': results,
+        }
+
+    # CSV rows with the InvestmentCreateSchema field names as header, values are validated by import_investments.
+    # Parsed line by line from the binary file, at most max_rows + 1 rows are read, one more tells the caller
+    # the file is over the limit without reading the rest of it
+    @staticmethod
+    def read_investment_csv(file: BinaryIO, max_rows: int) -> list:
+        return list(islice(csv.DictReader(codecs.iterdecode(file, 'utf-8-sig')), max_rows + 1))
+
+    @staticmethod
+    def _validation_detail(error: ValidationError) -> str:
+        return '; '.join(f"{'.'.join(str(loc) for loc in e['loc'])}: {e['msg']}" for e in error.errors())
+
+    # update an investment, allowed only for units
+    async def update_an_investment(self, user_id: str, investment_data: InvestmentUpdateSchema, session: AsyncSession):
+
+        # get the investment details
+        investment = await self.get_investment_by_user_id_scheme_code(user_id, investment_data.scheme_code, session)
+
+        # if investment not found
+        if not investment:
+            return None
+
+        scheme_nav = investment.scheme_nav.nav if investment.scheme_nav else None
+        previous_contribution = portfolio_summary_service.contribution(investment, scheme_nav)
+
+        # convert investment data into a dictionary
+        investment_data_dict = investment_data.model_dump()
+
+        # update the attributes
+        for key, value in investment_data_dict.items():
+            setattr(investment, key, value)
+        await session.flush()
+
+        await portfolio_summary_service.apply_investment_change(
+            user_id, session, old=previous_contribution,
+            new=portfolio_summary_service.contribution(investment, scheme_nav)
+        )
+        await session.commit()
+        await session.refresh(investment)
+
+        return investment
+
+    # delete an investment
+    async def delete_an_investment(self, user_id: str, scheme_code: str, session: AsyncSession):
+        # get the investment details
+        investment = await self.get_investment_by_user_id_scheme_code(user_id, scheme_code, session)
+
+        # if investment not found
+        if not investment:
+            return None
+
+        scheme_nav = investment.scheme_nav.nav if investment.scheme_nav else None
+        contribution = portfolio_summary_service.contribution(investment, scheme_nav)
+
+        # delete the investment from db
+        await session.delete(investment)
+        await session.flush()
+
+        await portfolio_summary_service.apply_investment_change(user_id, session, old=contribution)
+        await session.commit()
+        return investment
+
+    async def get_distinct_scheme_codes(self, session: AsyncSession):
+        statement = select(Investment.scheme_code).distinct()
+        result = await session.exec(statement)
+        return result.all()
+
+    # update all nav values of investments
+    async def update_nav_for_all_investments(self, session: AsyncSession, mode: str = None):
+
+        run_stats = new_nav_run_stats(mode)
+        started_at = time.perf_counter()
+
+        # update the current nav value and current_value of units
+        try:
+            scheme_navs = await self.resolve_latest_navs(run_stats, session)
+            await self._write_navs(scheme_navs, run_stats, session)
+
+            run_stats['elapsed_ms'] = round((time.perf_counter() - started_at) * 1000, 2)
+            observe_nav_refresh(run_stats, 'success')
+            print(f"Done updating investments every hour... {run_stats}")
+
+            return {
+                'message': 'All NAVs have been updated successfully.',
+                'stats': run_stats
+            }
+        except Exception as e:
+            await session.rollback()
+            run_stats['elapsed_ms'] = round((time.perf_counter() - started_at) * 1000, 2)
+            observe_nav_refresh(run_stats, 'failure')
+            print(f"Exception occurred while updating the NAV details: {str(e)}")
+            return {
+                'message': 'Update not successful',
+                'stats': run_stats
+            }
+
+    # first half of a refresh, also used on its own by the celery coordinator before it shards the writes
+    async def resolve_latest_navs(self, run_stats: dict, session: AsyncSession) -> list:
+        # pull the scheme universe once per run, this also refreshes the catalog endpoints
+        catalog = await catalog_service.refresh_catalog()
+        run_stats['downloads'] += 1
+
+        # resolve the latest nav once per distinct scheme held
+        return await self._resolve_scheme_navs(catalog, run_stats, session)
+
+    # second half of a refresh for an already resolved set of schemes, run by the celery shard tasks
+    async def apply_nav_updates(self, scheme_navs: list, session: AsyncSession, mode: str = None) -> dict:
+
+        run_stats = new_nav_run_stats(mode)
+        started_at = time.perf_counter()
+
+        try:
+            await self._write_navs(scheme_navs, run_stats, session)
+        except Exception:
+            # raised to the caller so the task can be retried
+            await session.rollback()
+            run_stats['elapsed_ms'] = round((time.perf_counter() - started_at) * 1000, 2)
+            observe_nav_refresh(run_stats, 'failure')
+            raise
+
+        run_stats['elapsed_ms'] = round((time.perf_counter() - started_at) * 1000, 2)
+        observe_nav_refresh(run_stats, 'success')
+
+        return {
+            'message': 'NAVs have been updated successfully.',
+            'stats': run_stats
+        }
+
+    async def _write_navs(self, scheme_navs: list, run_stats: dict, session: AsyncSession):
+
+        # scheme_navs holds the last applied nav and date, a scheme whose snapshot matches it is not written at all
+        previous_navs = await self._get_previous_navs(scheme_navs, session)
+        changed_navs = [
+            params for params in scheme_navs
+            if not self._is_unchanged(previous_navs.get(params['b_scheme_code']), params)
+        ]
+        run_stats['schemes_total'] += len(scheme_navs)
+        run_stats['schemes_changed'] += len(changed_navs)
+        run_stats['schemes_skipped'] += len(scheme_navs) - len(changed_navs)
+
+        if changed_navs:
+            # the legacy modes also rewrite the denormalized columns of every holding
+            if run_stats['mode'] == 'bulk':
+                await self._write_investment_navs_bulk(changed_navs, run_stats, session)
+            elif run_stats['mode'] == 'orm':
+                await self._write_investment_navs_orm(changed_navs, run_stats, session)
+
+            # one row per scheme, holdings derive nav and current_value from it at read time
+            await self._write_scheme_navs(changed_navs, previous_navs, run_stats, session)
+
+            await self._update_portfolio_summaries(run_stats['mode'], changed_navs, previous_navs, run_stats, session)
+
+        # a single commit per run: a committed scheme_navs row makes the next run skip the scheme, so it must
+        # never become visible without the holding and summary writes that go with it
+        await session.commit()
+        run_stats['commits'] += 1
+
+    async def _resolve_scheme_navs(self, catalog: SchemeCatalog, run_stats: dict, session: AsyncSession) -> list:
+        scheme_navs = []
+        for scheme_code in await self.get_distinct_scheme_codes(session):
+            latest_nav = catalog.get_nav(scheme_code)
+            run_stats['lookups'] += 1
+
+            if not latest_nav:
+                run_stats['missing_schemes'] += 1
+                continue
+
+            nav, nav_date = latest_nav
+            scheme_navs.append({
+                'b_scheme_code': scheme_code,
+                'b_nav': round(nav, 4),
+                'b_date': self._parse_nav_date(nav_date),
+            })
+        return scheme_navs
+
+    # {scheme_code: (nav, date)} as last applied, read only for the schemes of this run so a shard
+    # task never reads the other shards' rows
+    async def _get_previous_navs(self, scheme_navs: list, session: AsyncSession) -> dict:
+        previous_navs = {}
+        for scheme_codes in chunked([params['b_scheme_code'] for params in scheme_navs]):
+            statement = (
+                select(SchemeNav.scheme_code, SchemeNav.nav, SchemeNav.date)
+                .where(SchemeNav.scheme_code.in_(scheme_codes))
+            )
+            result = await session.exec(statement)
+            previous_navs.update((scheme_code, (nav, date)) for scheme_code, nav, date in result.all())
+        return previous_navs
+
+    @staticmethod
+    def _same_nav(previous_nav: float, nav: float) -> bool:
+        # FLOAT columns on MySQL are single precision, an exact comparison would flag every scheme as changed.
+        # One float32 step (2**-23 relative) absorbs the round trip, anything larger is a real change
+        return math.isclose(previous_nav, nav, rel_tol=2 ** -23, abs_tol=5e-5)
+
+    @classmethod
+    def _is_unchanged(cls, previous: tuple | None, params: dict) -> bool:
+        if previous is None:
+            return False
+        previous_nav, previous_date = previous
+        return (previous_date.replace(tzinfo=None) == params['b_date'].replace(tzinfo=None)
+                and cls._same_nav(previous_nav, params['b_nav']))
+
+    # upsert scheme_navs: one write per scheme, split into batched executemany inserts and updates
+    async def _write_scheme_navs(self, scheme_navs: list, previous_navs: dict, run_stats: dict, session: AsyncSession):
+
+        scheme_navs_table = SchemeNav.__table__
+        existing_codes = previous_navs.keys()
+
+        insert_statement = insert(scheme_navs_table).values(
+            scheme_code=bindparam('b_scheme_code'),
+            nav=bindparam('b_nav'),
+            date=bindparam('b_date'),
+        )
+        update_statement = (
+            update(scheme_navs_table)
+            .where(scheme_navs_table.c.scheme_code == bindparam('b_scheme_code'))
+            .values(nav=bindparam('b_nav'), date=bindparam('b_date'))
+        )
+
+        await self._execute_batched(
+            insert_statement, [params for params in scheme_navs if params['b_scheme_code'] not in existing_codes],
+            run_stats, session
+        )
+        await self._execute_batched(
+            update_statement, [params for params in scheme_navs if params['b_scheme_code'] in existing_codes],
+            run_stats, session
+        )
+        run_stats['schemes_written'] += len(scheme_navs)
+
+    async def _update_portfolio_summaries(self, mode: str, scheme_navs: list, previous_navs: dict, run_stats: dict,
+                                          session: AsyncSession):
+        # the legacy modes overwrite the stored nav of every holding, so the affected summaries are rebuilt
+        if mode != 'normalized':
+            await session.flush()
+            run_stats['summaries_updated'] += await portfolio_summary_service.rebuild_summaries_for_schemes(
+                [params['b_scheme_code'] for params in scheme_navs], session
+            )
+            return
+
+        nav_changes = {}
+        for params in scheme_navs:
+            previous_nav = previous_navs[params['b_scheme_code']][0] if params['b_scheme_code'] in previous_navs else None
+            # a new date with the same nav leaves the totals alone, the summaries are still written to bump their version
+            if previous_nav is not None and self._same_nav(previous_nav, params['b_nav']):
+                nav_changes[params['b_scheme_code']] = (previous_nav, previous_nav)
+            else:
+                nav_changes[params['b_scheme_code']] = (previous_nav, params['b_nav'])
+        run_stats['summaries_updated'] += await portfolio_summary_service.apply_nav_changes(nav_changes, session)
+
+    # original path: update every holding through the ORM, only the holdings of this run's schemes are loaded
+    # so a shard task does not read the whole table
+    async def _write_investment_navs_orm(self, scheme_navs: list, run_stats: dict, session: AsyncSession):
+
+        navs_by_code = {params['b_scheme_code']: params for params in scheme_navs}
+
+        for scheme_codes in chunked(list(navs_by_code)):
+            result = await session.exec(select(Investment).where(Investment.scheme_code.in_(scheme_codes)))
+            for investment in result.all():
+                scheme_nav = navs_by_code[investment.scheme_code]
+                investment.date = scheme_nav['b_date']
+                investment.nav = scheme_nav['b_nav']
+                investment.current_value = round((scheme_nav['b_nav'] * investment.units), 4)
+                session.add(investment)
+                run_stats['investments'] += 1
+
+    # set-based path: one UPDATE per scheme, sent as batched executemany, current_value computed by the database
+    async def _write_investment_navs_bulk(self, scheme_navs: list, run_stats: dict, session: AsyncSession):
+
+        investments_table = Investment.__table__
+        statement = (
+            update(investments_table)
+            .where(investments_table.c.scheme_code == bindparam('b_scheme_code'))
+            .values(
+                nav=bindparam('b_nav', type_=Float),
+                date=bindparam('b_date', type_=investments_table.c.date.type),
+                current_value=func.round(investments_table.c.units * bindparam('b_nav', type_=Float), 4),
+            )
+        )
+        run_stats['investments'] += await self._execute_batched(statement, scheme_navs, run_stats, session)
+
+    # executemany in batches of NAV_UPDATE_BATCH_SIZE, all in the caller's transaction
+    async def _execute_batched(self, statement, params: list, run_stats: dict, session: AsyncSession) -> int:
+        batch_size = max(config_obj.NAV_UPDATE_BATCH_SIZE, 1)
+
+        rowcount = 0
+        for start in range(0, len(params), batch_size):
+            result = await session.execute(statement, params[start:start + batch_size])
+            run_stats['batches'] += 1
+            if result.rowcount and result.rowcount > 0:
+                rowcount += result.rowcount
+        return rowcount
+
+    @staticmethod
+    def _parse_nav_date(nav_date: str) -> datetime:
+        return datetime.strptime(nav_date, "%d-%b-%Y")
+
+
+    # the catalog endpoints load the catalog once per request and pass it to the methods below, so the ETag and
+    # the body come from the same catalog and a failed load is not attempted a second time
+    async def get_catalog(self) -> SchemeCatalog:
+        return await catalog_service.get_catalog()
+
+    # None when the catalog cannot be loaded, the listings taking it answer with their error body then
+    async def get_catalog_or_none(self) -> SchemeCatalog | None:
+        try:
+            return await catalog_service.get_catalog()
+        except Exception as e:
+            print(f"Error reading JSON from file: {str(e)}")
+            return None
+
+    async def get_funds_from_RapidAPI(self, catalog: SchemeCatalog | None, fields: list = None):
+        if catalog is None:
+            return {
+                "message" : "Error while fetching"
+            }
+        return {
+            "data": catalog.to_dicts(fields),
+        }
+
+    # the listings below only change with the catalog, their whole response bodies are encoded and compressed
+    # once per catalog and shared by every request
+    async def get_funds_body(self, catalog: SchemeCatalog | None, message: str) -> PrecompressedBody:
+        if catalog is None:
+            return self._catalog_error_body(message)
+        return await catalog.payload(
+            ('schemes', message), lambda: {"message": message, "data": {"data": catalog.to_dicts()}}
+        )
+
+    @staticmethod
+    def _catalog_error_body(message: str) -> PrecompressedBody:
+        return PrecompressedBody(orjson.dumps({"message": message, "data": {"message": "Error while fetching"}}), {})
+
+    async def get_funds_page(self, catalog: SchemeCatalog, cursor: int = None, limit: int = 100, fields: list = None):
+        return catalog.page(cursor, limit, fields)
+
+    async def iter_funds(self, catalog: SchemeCatalog, fields: list = None):
+        return catalog.iter_schemes(fields)
+
+    async def search_funds(self, catalog: SchemeCatalog, query: str, limit: int = 10, fields: list = None):
+        return catalog.search(query, limit, fields)
+
+    async def get_famity_funds_from_RapidAPI(self, catalog: SchemeCatalog | None, message: str) -> PrecompressedBody:
+        if catalog is None:
+            return self._catalog_error_body(message)
+        return await catalog.payload(('families', message), lambda: {"message": message, "data": catalog.families})
+
+    async def get_open_funds_by_family(self, catalog: SchemeCatalog | None, fund_family: str,
+                                       message: str) -> PrecompressedBody:
+        if catalog is None:
+            return self._catalog_error_body(message)
+        if fund_family is None:
+            return await self.get_funds_body(catalog, message)
+        # unknown families are not cached, the cache stays bounded by the families the catalog has
+        if not catalog.has_family(fund_family):
+            return PrecompressedBody(orjson.dumps({"message": message, "data": {"data": []}}), {})
+        return await catalog.payload(
+            ('family', fund_family, message),
+            lambda: {"message": message, "data": {"data": catalog.get_family_schemes(fund_family)}},
+        )
@@ -0,0 +1,231 @@
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.models.db_models import Investment, SchemeNav, PortfolioSummary
+
+# upper bound for the number of ids sent in one IN (...) clause
+IN_CLAUSE_CHUNK_SIZE = 500
+
+
+def chunked(values: list, size: int = IN_CLAUSE_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class PortfolioSummaryService:
+    """
+    Maintains one aggregate row per user in portfolio_summaries.
+
+    Writers pass per-family deltas in the same transaction as the change they describe, so reading
+    a summary is a single primary key lookup. A user without a row yet gets one rebuilt from investments,
+    created so that concurrent first writes for the same user do not fail on the primary key.
+    Every write bumps the row's version, which versions all of the user's portfolio responses.
+    """
+
+    async def get_summary(self, user_id: str, session: AsyncSession) -> dict:
+        summary = await session.get(PortfolioSummary, user_id)
+        if summary is None:
+            summaries = await self.rebuild_summaries([user_id], session)
+            await session.commit()
+            summary = summaries[user_id]
+        return self.to_view(summary)
+
+    @staticmethod
+    def to_view(summary: PortfolioSummary) -> dict:
+        fund_families = [
+            {
+                'fund_family': fund_family,
+                'invested_value': values['invested_value'],
+                'current_value': values['current_value'],
+                'gain': round(values['current_value'] - values['invested_value'], 4),
+                'holdings': values['holdings'],
+            }
+            for fund_family, values in sorted(summary.family_breakdown.items())
+        ]
+        return {
+            'invested_value': summary.invested_value,
+            'current_value': summary.current_value,
+            'gain': round(summary.current_value - summary.invested_value, 4),
+            'holdings': summary.holdings,
+            'fund_families': fund_families,
+            'updated_at': summary.updated_at,
+        }
+
+    # what one holding adds to its owner's summary, current value follows the same rule as InvestmentViewSchema.
+    # Invested value is valued at the purchase nav, nav itself is rewritten by the legacy NAV refresh modes.
+    # investment can also be an InvestmentCreateSchema that is not inserted yet
+    @staticmethod
+    def contribution(investment: Investment, scheme_nav: float | None) -> tuple[str, float, float]:
+        invested_value = investment.units * investment.purchase_nav
+        if scheme_nav is None:
+            current_value = investment.current_value
+        else:
+            current_value = investment.units * scheme_nav
+        return investment.fund_family, invested_value, current_value
+
+    @staticmethod
+    def add_delta(deltas: dict, user_id: str, fund_family: str, invested_value: float, current_value: float,
+                  holdings: int = 0):
+        family_delta = deltas.setdefault(user_id, {}).setdefault(fund_family, [0.0, 0.0, 0])
+        family_delta[0] += invested_value
+        family_delta[1] += current_value
+        family_delta[2] += holdings
+
+    # None until the user's summary row exists
+    async def get_version(self, user_id: str, session: AsyncSession) -> int | None:
+        result = await session.exec(select(PortfolioSummary.version).where(PortfolioSummary.user_id == user_id))
+        return result.first()
+
+    async def get_scheme_nav(self, scheme_code: int, session: AsyncSession) -> float | None:
+        result = await session.exec(select(SchemeNav.nav).where(SchemeNav.scheme_code == scheme_code))
+        return result.first()
+
+    async def apply_investment_change(self, user_id: str, session: AsyncSession, old: tuple = None, new: tuple = None):
+        deltas = {}
+        if old is not None:
+            fund_family, invested_value, current_value = old
+            self.add_delta(deltas, user_id, fund_family, -invested_value, -current_value, -1)
+        if new is not None:
+            fund_family, invested_value, current_value = new
+            self.add_delta(deltas, user_id, fund_family, invested_value, current_value, 1)
+        await self.apply_deltas(deltas, session)
+
+    # deltas: {user_id: {fund_family: [invested_value, current_value, holdings]}}, the change must already be flushed
+    async def apply_deltas(self, deltas: dict, session: AsyncSession) -> int:
+        created_user_ids = []
+        # rows are locked in user_id order so concurrent shard tasks cannot deadlock on each other
+        for user_ids in chunked(sorted(deltas)):
+            summaries = await self._lock_summaries(user_ids, session)
+            missing_user_ids = [user_id for user_id in user_ids if user_id not in summaries]
+            created = set()
+            if missing_user_ids:
+                created.update(await self.create_summary_rows(missing_user_ids, session))
+                created_user_ids.extend(created)
+                # rows another transaction created meanwhile take the delta like any other
+                summaries.update(await self._lock_summaries(
+                    [user_id for user_id in missing_user_ids if user_id not in created], session
+                ))
+
+            for user_id in user_ids:
+                if user_id in created:
+                    # the rebuild reads the flushed rows, so it already includes this change
+                    continue
+
+                summary = summaries[user_id]
+                family_breakdown = {fund_family: dict(values) for fund_family, values in summary.family_breakdown.items()}
+                for fund_family, (invested_value, current_value, holdings) in deltas[user_id].items():
+                    values = family_breakdown.setdefault(
+                        fund_family, {'invested_value': 0.0, 'current_value': 0.0, 'holdings': 0}
+                    )
+                    values['invested_value'] = round(values['invested_value'] + invested_value, 4)
+                    values['current_value'] = round(values['current_value'] + current_value, 4)
+                    values['holdings'] += holdings
+                    if values['holdings'] <= 0:
+                        del family_breakdown[fund_family]
+
+                self._set_totals(summary, family_breakdown)
+
+        if created_user_ids:
+            await self.rebuild_summaries(created_user_ids, session)
+        await session.flush()
+        return len(deltas)
+
+    async def _lock_summaries(self, user_ids: list, session: AsyncSession) -> dict:
+        if not user_ids:
+            return {}
+        statement = select(PortfolioSummary).where(PortfolioSummary.user_id.in_(user_ids)).with_for_update()
+        result = await session.exec(statement)
+        return {summary.user_id: summary for summary in result.all()}
+
+    # empty rows for the users, each inserted in its own savepoint: a row another transaction inserted first
+    # is skipped instead of failing the caller's transaction. Returns the user ids whose row was created here.
+    async def create_summary_rows(self, user_ids: list, session: AsyncSession) -> list:
+        created = []
+        for user_id in user_ids:
+            try:
+                async with session.begin_nested():
+                    await session.execute(insert(PortfolioSummary.__table__).values(
+                        user_id=user_id, invested_value=0.0, current_value=0.0, holdings=0, family_breakdown={},
+                    ))
+            except IntegrityError:
+                continue
+            created.append(user_id)
+        return created
+
+    # nav_changes: {scheme_code: (previous_nav or None, new_nav)}
+    async def apply_nav_changes(self, nav_changes: dict, session: AsyncSession) -> int:
+        deltas = {}
+        for scheme_codes in chunked(list(nav_changes)):
+            statement = (
+                select(Investment.user_id, Investment.fund_family, Investment.scheme_code,
+                       func.sum(Investment.units), func.sum(Investment.current_value))
+                .where(Investment.scheme_code.in_(scheme_codes))
+                .group_by(Investment.user_id, Investment.fund_family, Investment.scheme_code)
+            )
+            result = await session.exec(statement)
+            for user_id, fund_family, scheme_code, units, stored_current_value in result.all():
+                previous_nav, nav = nav_changes[scheme_code]
+                # without a previous scheme_navs row the holdings were valued at their stored current_value
+                previous_value = stored_current_value if previous_nav is None else units * previous_nav
+                self.add_delta(deltas, user_id, fund_family, 0.0, units * nav - previous_value)
+        return await self.apply_deltas(deltas, session)
+
+    async def rebuild_summaries_for_schemes(self, scheme_codes: list, session: AsyncSession) -> int:
+        user_ids = set()
+        for codes in chunked(list(scheme_codes)):
+            statement = select(Investment.user_id).where(Investment.scheme_code.in_(codes)).distinct()
+            result = await session.exec(statement)
+            user_ids.update(result.all())
+        summaries = await self.rebuild_summaries(list(user_ids), session)
+        return len(summaries)
+
+    # recompute summaries from the investments table in one grouped query per chunk of users
+    async def rebuild_summaries(self, user_ids: list, session: AsyncSession) -> dict:
+        rebuilt = {}
+        for chunk in chunked(sorted(user_ids)):
+            family_breakdowns = {user_id: {} for user_id in chunk}
+            statement = (
+                select(Investment.user_id, Investment.fund_family,
+                       func.sum(Investment.units * Investment.purchase_nav),
+                       func.sum(func.coalesce(Investment.units * SchemeNav.nav, Investment.current_value)),
+                       func.count())
+                .select_from(Investment)
+                .outerjoin(SchemeNav, SchemeNav.scheme_code == Investment.scheme_code)
+                .where(Investment.user_id.in_(chunk))
+                .group_by(Investment.user_id, Investment.fund_family)
+            )
+            result = await session.exec(statement)
+            for user_id, fund_family, invested_value, current_value, holdings in result.all():
+                family_breakdowns[user_id][fund_family] = {
+                    'invested_value': round(invested_value, 4),
+                    'current_value': round(current_value, 4),
+                    'holdings': holdings,
+                }
+
+            summaries = await self._lock_summaries(chunk, session)
+            missing_user_ids = [user_id for user_id in chunk if user_id not in summaries]
+            if missing_user_ids:
+                await self.create_summary_rows(missing_user_ids, session)
+                summaries.update(await self._lock_summaries(missing_user_ids, session))
+
+            for user_id, family_breakdown in family_breakdowns.items():
+                summary = summaries[user_id]
+                self._set_totals(summary, family_breakdown)
+                rebuilt[user_id] = summary
+
+        await session.flush()
+        return rebuilt
+
+    @staticmethod
+    def _set_totals(summary: PortfolioSummary, family_breakdown: dict):
+        # totals are re-summed from the breakdown so the two never drift apart
+        summary.family_breakdown = family_breakdown
+        summary.invested_value = round(sum(values['invested_value'] for values in family_breakdown.values()), 4)
+        summary.current_value = round(sum(values['current_value'] for values in family_breakdown.values()), 4)
+        summary.holdings = sum(values['holdings'] for values in family_breakdown.values())
+        summary.version = (summary.version or 0) + 1
+
+
+portfolio_summary_service = PortfolioSummaryService()
@@ -0,0 +1,198 @@
+import re
+from array import array
+from bisect import bisect_left, insort
+from heapq import merge
+from itertools import islice
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# per query token: exact scheme name token, prefix of a scheme name token, fund family token
+EXACT_NAME_SCORE = 3
+PREFIX_NAME_SCORE = 2
+FAMILY_SCORE = 1
+
+# tiers with more postings than this are walked in doc id order first, queries on common words settle within
+# a couple of docs per requested result. Shorter tiers are intersected right away
+SCAN_MIN_POSTINGS = 1024
+SCAN_BUDGET_PER_RESULT = 2
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class _TokenMatch:
+    """
+    What one query token matches: docs with it as a name token, with a longer name token it is a prefix of,
+    and with a family token it is a prefix of. The sets answer membership, the tiers hold the same docs as
+    ascending arrays, best tier first.
+    """
+
+    __slots__ = ('exact', 'names', 'families', 'tiers', 'size')
+
+    def __init__(self, exact: tuple | None, names: list, families: list):
+        self.exact = exact[0] if exact else frozenset()
+        self.names = [docs for docs, _ in names]
+        self.families = [docs for docs, _ in families]
+        self.tiers = [(score, ordered) for score, ordered in (
+            (EXACT_NAME_SCORE, [exact[1]] if exact else []),
+            (PREFIX_NAME_SCORE, [ordered for _, ordered in names]),
+            (FAMILY_SCORE, [ordered for _, ordered in families]),
+        ) if ordered]
+        self.size = len(self.exact) + sum(len(docs) for docs in self.names) + sum(len(docs) for docs in self.families)
+
+    def score(self, doc: int) -> int:
+        if doc in self.exact:
+            return EXACT_NAME_SCORE
+        for docs in self.names:
+            if doc in docs:
+                return PREFIX_NAME_SCORE
+        for docs in self.families:
+            if doc in docs:
+                return FAMILY_SCORE
+        return 0
+
+    # the highest score the token gives any doc, or any of the given docs
+    def best_score(self, docs: set = None) -> int:
+        if docs is None:
+            return self.tiers[0][0]
+        if not docs.isdisjoint(self.exact):
+            return EXACT_NAME_SCORE
+        if any(not docs.isdisjoint(name_docs) for name_docs in self.names):
+            return PREFIX_NAME_SCORE
+        return FAMILY_SCORE
+
+    def intersect(self, docs: set) -> set:
+        return docs.intersection(self.exact).union(*(docs.intersection(other) for other in self.names + self.families))
+
+
+class SchemeSearchIndex:
+    """
+    Inverted token index over Scheme_Name and Mutual_Fund_Family with a sorted vocabulary for prefix lookups.
+
+    Every query token must match (AND), each one as a prefix of some indexed token, so
+    partially typed words work for type-ahead. Results are ranked by summed token scores,
+    then by shorter scheme name.
+
+    Doc ids follow the tie-break order and every posting is also kept as an ascending doc id array. A query
+    walks the most selective token's docs tier by tier (exact name, name prefix, family) and stops once
+    `limit` docs score above anything the rest can reach, instead of scoring every candidate.
+    """
+
+    def __init__(self, schemes: list):
+        # doc ids follow the tie-break order (shorter names first), so ranking only compares scores and ids
+        self._schemes = sorted(schemes, key=lambda scheme: len(scheme.get("Scheme_Name") or ""))
+        name_docs = {}
+        family_docs = {}
+
+        for doc, scheme in enumerate(self._schemes):
+            for token in set(tokenize(scheme.get("Scheme_Name"))):
+                name_docs.setdefault(token, array('I')).append(doc)
+            for token in set(tokenize(scheme.get("Mutual_Fund_Family"))):
+                family_docs.setdefault(token, array('I')).append(doc)
+
+        # (doc id set, the same ids as an ascending array) per token
+        self._name_postings = {token: (frozenset(docs), docs) for token, docs in name_docs.items()}
+        self._family_postings = {token: (frozenset(docs), docs) for token, docs in family_docs.items()}
+        self._vocabulary = sorted(self._name_postings.keys() | self._family_postings.keys())
+
+    def __len__(self) -> int:
+        return len(self._vocabulary)
+
+    def _expand(self, prefix: str) -> list:
+        terms = []
+        position = bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            terms.append(self._vocabulary[position])
+            position += 1
+        return terms
+
+    def _match(self, token: str) -> _TokenMatch:
+        terms = self._expand(token)
+        # the larger postings first, so a doc is usually found after a few lookups
+        names = sorted((self._name_postings[term] for term in terms if term != token and term in self._name_postings),
+                       key=lambda postings: len(postings[1]), reverse=True)
+        families = sorted((self._family_postings[term] for term in terms if term in self._family_postings),
+                          key=lambda postings: len(postings[1]), reverse=True)
+        return _TokenMatch(self._name_postings.get(token), names, families)
+
+    def search(self, query: str, limit: int = 10) -> list:
+        matches = [self._match(token) for token in dict.fromkeys(tokenize(query))]
+        if not matches or limit <= 0 or not all(match.size for match in matches):
+            return []
+
+        # every token has to match: walk the most selective one's docs, the others only score them
+        matches.sort(key=lambda match: match.size)
+        driving, others = matches[0], matches[1:]
+        others_best_score = sum(match.best_score() for match in others)
+
+        # at most `limit` docs per score, in ascending doc id order
+        docs_by_score = {}
+        for token_score, tier_docs in driving.tiers:
+            # a doc of this tier scores at most this, results scoring above it are final
+            bound = token_score + others_best_score
+            if self._settled(docs_by_score, bound, -1, limit):
+                break
+            self._collect_tier(token_score, tier_docs, bound, driving, others, limit, docs_by_score)
+
+        ranked = []
+        for score in sorted(docs_by_score, reverse=True):
+            ranked.extend(docs_by_score[score][:limit - len(ranked)])
+            if len(ranked) >= limit:
+                break
+        return [self._schemes[doc] for doc in ranked]
+
+    # True once no doc after `doc` scoring at most `score` can make the top `limit`: ties go to the smaller doc id
+    @staticmethod
+    def _settled(docs_by_score: dict, score: int, doc: int, limit: int) -> bool:
+        ahead = sum(len(docs) for doc_score, docs in docs_by_score.items() if doc_score > score)
+        ahead += sum(1 for scored_doc in docs_by_score.get(score, ()) if scored_doc <= doc)
+        return ahead >= limit
+
+    # scores one tier of the driving token's docs in ascending order until the top `limit` is settled
+    def _collect_tier(self, token_score: int, tier_docs: list, bound: int, driving: _TokenMatch, others: list,
+                      limit: int, docs_by_score: dict):
+        last_doc = -1
+        if sum(len(docs) for docs in tier_docs) > SCAN_MIN_POSTINGS:
+            budget = SCAN_BUDGET_PER_RESULT * limit
+            scanned = 0
+            for doc in islice(merge(*tier_docs), budget):
+                scanned += 1
+                if doc == last_doc:
+                    continue
+                last_doc = doc
+                if self._add(doc, token_score, bound, driving, others, limit, docs_by_score):
+                    return
+            if scanned < budget:
+                return
+
+        # the bound is rare or out of reach: narrow the rest of the tier down to the docs every token matches
+        # with set intersections, then bound it by the others' best scores among those docs only
+        candidates = set().union(*tier_docs)
+        for match in others:
+            if not candidates:
+                return
+            candidates = match.intersect(candidates)
+
+        bound = token_score + sum(match.best_score(candidates) for match in others)
+        for doc in sorted(candidates):
+            if doc > last_doc and self._add(doc, token_score, bound, driving, others, limit, docs_by_score):
+                return
+
+    # scores doc into docs_by_score, True once that settles the top `limit`
+    def _add(self, doc: int, token_score: int, bound: int, driving: _TokenMatch, others: list, limit: int,
+             docs_by_score: dict) -> bool:
+        # a doc the driving token matches better was scored with a higher tier
+        if driving.score(doc) != token_score:
+            return False
+        score = token_score
+        for match in others:
+            other_score = match.score(doc)
+            if not other_score:
+                return False
+            score += other_score
+
+        scored = docs_by_score.setdefault(score, [])
+        insort(scored, doc)
+        del scored[limit:]
+        return score == bound and self._settled(docs_by_score, bound, doc, limit)
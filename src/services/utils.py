@@ -1,16 +1,41 @@
+import re
 import jwt
 import uuid
+import time
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from config import config_obj
 from passlib.context import CryptContext
+from src.errors import PasswordHashingBusy
 
 ACCESS_TOKEN_EXPIRY = 3600
 
+# header.payload.signature, each part base64url encoded
+TOKEN_PATTERN = re.compile(r'^[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*$')
+
 password_context = CryptContext(
-    schemes=['bcrypt']
+    schemes=['bcrypt'],
+    bcrypt__rounds=config_obj.PASSWORD_HASH_ROUNDS
+)
+
+# bcrypt releases the GIL, so a small dedicated thread pool keeps hashing off the event loop
+password_hash_executor = ThreadPoolExecutor(
+    max_workers=config_obj.PASSWORD_HASH_WORKERS,
+    thread_name_prefix='password-hash'
 )
 
+password_hash_stats = {
+    'calls': 0,
+    'rejected': 0,
+    'in_flight': 0,
+    'hash_ms_total': 0.0,
+    'hash_ms_max': 0.0,
+    'queue_ms_total': 0.0,
+    'queue_ms_max': 0.0,
+}
+
 def generate_password_hash(password: str) -> str:
     password_hash = password_context.hash(password)
     return password_hash
@@ -18,6 +43,52 @@ def generate_password_hash(password: str) -> str:
 def verify_password_hash(password: str, password_hash: str) -> bool:
     return password_context.verify(password, password_hash)
 
+async def _run_password_hashing(function, *args):
+    # fail fast instead of queueing without bound when a login burst saturates the pool
+    if password_hash_stats['in_flight'] >= config_obj.PASSWORD_HASH_WORKERS + config_obj.PASSWORD_HASH_QUEUE_LIMIT:
+        password_hash_stats['rejected'] += 1
+        raise PasswordHashingBusy()
+
+    def timed_call():
+        started_at = time.perf_counter()
+        result = function(*args)
+        return result, started_at, time.perf_counter()
+
+    password_hash_stats['in_flight'] += 1
+    submitted_at = time.perf_counter()
+    try:
+        result, started_at, finished_at = await asyncio.get_running_loop().run_in_executor(
+            password_hash_executor, timed_call
+        )
+    finally:
+        password_hash_stats['in_flight'] -= 1
+
+    queue_ms = (started_at - submitted_at) * 1000
+    hash_ms = (finished_at - started_at) * 1000
+    password_hash_stats['calls'] += 1
+    password_hash_stats['queue_ms_total'] += queue_ms
+    password_hash_stats['queue_ms_max'] = max(password_hash_stats['queue_ms_max'], queue_ms)
+    password_hash_stats['hash_ms_total'] += hash_ms
+    password_hash_stats['hash_ms_max'] = max(password_hash_stats['hash_ms_max'], hash_ms)
+    return result
+
+async def generate_password_hash_async(password: str) -> str:
+    return await _run_password_hashing(generate_password_hash, password)
+
+async def verify_password_hash_async(password: str, password_hash: str) -> bool:
+    return await _run_password_hashing(verify_password_hash, password, password_hash)
+
+def get_password_hash_stats() -> dict:
+    calls = password_hash_stats['calls']
+    return {
+        **{key: round(value, 3) if isinstance(value, float) else value for key, value in password_hash_stats.items()},
+        'workers': config_obj.PASSWORD_HASH_WORKERS,
+        'queue_limit': config_obj.PASSWORD_HASH_QUEUE_LIMIT,
+        'rounds': config_obj.PASSWORD_HASH_ROUNDS,
+        'hash_ms_avg': round(password_hash_stats['hash_ms_total'] / calls, 3) if calls else 0.0,
+        'queue_ms_avg': round(password_hash_stats['queue_ms_total'] / calls, 3) if calls else 0.0,
+    }
+
 def create_access_token(user_data: dict, expiry: timedelta = None, refresh: bool = False):
     payload = {
         'user': user_data,
@@ -33,6 +104,9 @@ def create_access_token(user_data: dict, expiry: timedelta = None, refresh: bool
     )
     return token
 
+def is_well_formed_token(token: str) -> bool:
+    return bool(token) and TOKEN_PATTERN.match(token) is not None
+
 def decode_access_token(token: str) -> dict:
     try:
         token_data = jwt.decode(
@@ -43,5 +117,6 @@ def decode_access_token(token: str) -> dict:
 
         return token_data
     except jwt.PyJWTError as e:
-        logging.exception(e)
+        # an invalid token is an expected client error, no traceback needed
+        logging.warning("Rejected access token: %s", e)
         return None
\ No newline at end of file
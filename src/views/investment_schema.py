@@ -1,28 +1,82 @@
-import datetime
-
-from pydantic import BaseModel
-import uuid
-
-class InvestmentViewSchema(BaseModel):
-    investment_id: uuid.UUID
-    scheme_name: str
-    scheme_code: int
-    units: float
-    nav: float
-    date: datetime.datetime
-    current_value: float
-    fund_family: str
-
-class InvestmentCreateSchema(BaseModel):
-    scheme_code: int
-    units: float
-    scheme_name: str
-    nav: float
-    date: datetime.datetime
-    current_value: float
-    fund_family: str
-
-class InvestmentUpdateSchema(BaseModel):
-    scheme_code: int
-    units: float
-    current_value: float
+import datetime
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, model_validator
+import uuid
+
+class InvestmentViewSchema(BaseModel):
+    investment_id: uuid.UUID
+    scheme_name: str
+    scheme_code: int
+    units: float
+    nav: float
+    date: datetime.datetime
+    current_value: float
+    fund_family: str
+
+    # nav lives in scheme_navs, so nav, date and current_value are derived from the joined row
+    @model_validator(mode='before')
+    @classmethod
+    def derive_from_scheme_nav(cls, data: Any) -> Any:
+        if getattr(data, 'scheme_nav', None) is None:
+            return data
+        return investment_view(data)
+
+def _view_fields(investment: Any, nav: float, date: datetime.datetime, current_value: float) -> dict:
+    return {
+        'investment_id': investment.investment_id,
+        'scheme_name': investment.scheme_name,
+        'scheme_code': investment.scheme_code,
+        'units': float(investment.units),
+        'nav': float(nav),
+        'date': date,
+        'current_value': float(current_value),
+        'fund_family': investment.fund_family,
+    }
+
+# InvestmentViewSchema fields of an Investment ORM object, ready to encode without a validation pass
+def investment_view(investment: Any) -> dict:
+    scheme_nav = investment.scheme_nav
+    if scheme_nav is None:
+        return _view_fields(investment, investment.nav, investment.date, investment.current_value)
+    return _view_fields(investment, scheme_nav.nav, scheme_nav.date, round(investment.units * scheme_nav.nav, 4))
+
+# same for a row of InvestmentService.INVESTMENT_VIEW_COLUMNS, latest_nav is null without a scheme_navs row
+def investment_row_view(row: Any) -> dict:
+    if row.latest_nav is None:
+        return _view_fields(row, row.nav, row.date, row.current_value)
+    return _view_fields(row, row.latest_nav, row.latest_date, round(row.units * row.latest_nav, 4))
+
+class InvestmentCreateSchema(BaseModel):
+    scheme_code: int
+    units: float
+    scheme_name: str
+    nav: float
+    date: datetime.datetime
+    current_value: float
+    fund_family: str
+
+    # what Investment.purchase_nav is set to on insert, so a schema not inserted yet can be valued like a row
+    @property
+    def purchase_nav(self) -> float:
+        return self.nav
+
+class InvestmentUpdateSchema(BaseModel):
+    scheme_code: int
+    units: float
+    current_value: float
+
+class FundFamilySummarySchema(BaseModel):
+    fund_family: str
+    invested_value: float
+    current_value: float
+    gain: float
+    holdings: int
+
+class PortfolioSummarySchema(BaseModel):
+    invested_value: float
+    current_value: float
+    gain: float
+    holdings: int
+    fund_families: List[FundFamilySummarySchema]
+    updated_at: Optional[datetime.datetime] = None
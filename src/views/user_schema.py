@@ -1,24 +1,35 @@
-from datetime import datetime
-from pydantic import BaseModel, Field
-from typing import List
-from src.views.investment_schema import InvestmentViewSchema
-import uuid
-
-class UserViewSchema(BaseModel):
-    user_id: uuid.UUID
-    email: str
-    password_hash: str = Field(exclude=True)
-    is_verified: bool
-    created_at: datetime
-    updated_at: datetime
-
-class UserCreateSchema(BaseModel):
-    email: str = Field(max_length=40)
-    password: str = Field(min_length=8)
-
-class UserLoginSchema(BaseModel):
-    email: str = Field(max_length=40)
-    password: str = Field(min_length=8)
-
-class UserInvestmentSchemaView(UserViewSchema):
-    investments: List[InvestmentViewSchema]
\ No newline at end of file
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List
+from src.views.investment_schema import InvestmentViewSchema, investment_view
+import uuid
+
+class UserViewSchema(BaseModel):
+    user_id: uuid.UUID
+    email: str
+    password_hash: str = Field(exclude=True)
+    is_verified: bool
+    created_at: datetime
+    updated_at: datetime
+
+class UserCreateSchema(BaseModel):
+    email: str = Field(max_length=40)
+    password: str = Field(min_length=8)
+
+class UserLoginSchema(BaseModel):
+    email: str = Field(max_length=40)
+    password: str = Field(min_length=8)
+
+class UserInvestmentSchemaView(UserViewSchema):
+    investments: List[InvestmentViewSchema]
+
+# UserInvestmentSchemaView fields of a User loaded with its investments, ready to encode without a validation pass
+def user_investments_view(user) -> dict:
+    return {
+        'user_id': user.user_id,
+        'email': user.email,
+        'is_verified': user.is_verified,
+        'created_at': user.created_at,
+        'updated_at': user.updated_at,
+        'investments': [investment_view(investment) for investment in user.investments],
+    }
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""Settings for running the tests without a .env file, applied before any src module reads config."""
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'mfb_test.db')}")
+os.environ.setdefault("RAPID_API_URL", "http://rapidapi.test/latest")
+os.environ.setdefault("RAPID_API_KEY", "test")
+os.environ.setdefault("RAPID_API_HOST", "rapidapi.test")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-test-secret-key-test")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("DOMAIN", "localhost:8000")
+
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.models.db_models import Base, User
+from tests.helpers import USER_ID
+
+
+# a fresh SQLite database per test with one user, the services commit on this session themselves
+@pytest_asyncio.fixture
+async def session(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        session.add(User(user_id=USER_ID, email='user@example.com', password_hash='hash'))
+        await session.commit()
+        yield session
+    await engine.dispose()
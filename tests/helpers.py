@@ -0,0 +1,18 @@
+"""Rows shared by the database backed tests, see the session fixture in conftest."""
+from src.models.db_models import Investment, PortfolioSummary
+
+USER_ID = 'user-1'
+
+
+def add_investment(session, scheme_code: int, units: float, nav: float, current_value: float, fund_family: str,
+                   user_id: str = USER_ID):
+    session.add(Investment(
+        scheme_name=f'Scheme {scheme_code}', scheme_code=scheme_code, units=units, nav=nav,
+        current_value=current_value, fund_family=fund_family, user_id=user_id,
+    ))
+
+
+async def get_summary_row(session, user_id: str = USER_ID) -> PortfolioSummary:
+    summary = await session.get(PortfolioSummary, user_id)
+    await session.refresh(summary)
+    return summary
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from src.services.cache_service import TTLCache
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache = TTLCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'value'
+
+    results = await asyncio.gather(*(cache.get_or_load('key', loader) for _ in range(5)))
+
+    assert results == ['value'] * 5
+    assert len(calls) == 1
+    assert cache.stats['misses'] == 1
+    assert cache.stats['coalesced'] == 4
+    assert cache.peek('key') == 'value'
+
+
+@pytest.mark.asyncio
+async def test_cancelled_first_caller_does_not_cancel_waiters():
+    cache = TTLCache()
+    release = asyncio.Event()
+
+    async def loader():
+        await release.wait()
+        return 'value'
+
+    leader = asyncio.create_task(cache.get_or_load('key', loader))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_load('key', loader))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    release.set()
+
+    assert await follower == 'value'
+    assert cache.peek('key') == 'value'
+
+
+@pytest.mark.asyncio
+async def test_failed_load_reaches_every_waiter_and_is_not_cached():
+    cache = TTLCache()
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise ValueError('upstream down')
+
+    results = await asyncio.gather(*(cache.get_or_load('key', loader) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert cache.peek('key') is None
+    assert cache.get_stats()['inflight'] == 0
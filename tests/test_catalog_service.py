@@ -0,0 +1,51 @@
+import pytest
+
+from src.services.catalog_service import SchemeCatalog
+
+SCHEMES = [
+    {"Scheme_Code": 102, "Scheme_Name": "Alpha Liquid Fund", "Net_Asset_Value": 12.5, "Date": "17-Oct-2026",
+     "Mutual_Fund_Family": "Alpha Mutual Fund"},
+    {"Scheme_Code": 100, "Scheme_Name": "Alpha Flexi Cap Fund", "Net_Asset_Value": 10.0, "Date": "17-Oct-2026",
+     "Mutual_Fund_Family": "Alpha Mutual Fund"},
+    # no family, records keep exactly the keys RapidAPI sent
+    {"Scheme_Code": 101, "Scheme_Name": "Beta Gilt Fund", "Net_Asset_Value": 11.0, "Date": "16-Oct-2026"},
+]
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return SchemeCatalog(SCHEMES)
+
+
+def test_records_come_back_in_code_order_with_their_own_keys(catalog):
+    assert catalog.to_dicts() == sorted(SCHEMES, key=lambda scheme: scheme["Scheme_Code"])
+
+
+@pytest.mark.parametrize("fields", [
+    None,
+    ["Scheme_Code", "Net_Asset_Value"],
+    ["Scheme_Code", "Nope"],
+    ["Mutual_Fund_Family"],
+    ["Nope"],
+])
+def test_every_listing_projects_fields_the_same_way(catalog, fields):
+    listing = catalog.to_dicts(fields)
+
+    assert len(listing) == len(SCHEMES)
+    assert listing == list(catalog.iter_schemes(fields))
+    assert listing == catalog.page(None, len(SCHEMES), fields)[0]
+
+
+def test_pages_continue_after_the_cursor(catalog):
+    first, cursor = catalog.page(None, 2, ["Scheme_Code"])
+    second, last_cursor = catalog.page(cursor, 2, ["Scheme_Code"])
+
+    assert (first, cursor) == ([{"Scheme_Code": 100}, {"Scheme_Code": 101}], 101)
+    assert (second, last_cursor) == ([{"Scheme_Code": 102}], None)
+
+
+def test_nav_and_family_lookups(catalog):
+    assert catalog.get_nav(101) == (11.0, "16-Oct-2026")
+    assert catalog.get_nav(999) is None
+    assert catalog.families == ["Alpha Mutual Fund"]
+    assert [scheme["Scheme_Code"] for scheme in catalog.get_family_schemes("Alpha Mutual Fund")] == [100, 102]
@@ -0,0 +1,60 @@
+import gzip
+
+import brotli
+import pytest
+
+from src.compression import PrecompressedBody, choose_encoding
+
+LEVELS = {'br': 4, 'gzip': 6}
+BODY = b'{"data": [' + b', '.join(b'{"Scheme_Code": %d}' % code for code in range(500)) + b']}'
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ('', None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('gzip, deflate, br', 'br'),
+    ('br;q=0, gzip;q=0.5', 'gzip'),
+    ('BR;Q=1', 'br'),
+    ('*', 'br'),
+    ('*;q=0', None),
+    ('gzip;q=abc', None),
+])
+def test_choose_encoding(accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+@pytest.mark.asyncio
+async def test_each_coding_decodes_to_the_same_body():
+    payload = PrecompressedBody(BODY, LEVELS)
+
+    body, encoding = await payload.select('br')
+    assert encoding == 'br' and brotli.decompress(body) == BODY
+    body, encoding = await payload.select('gzip')
+    assert encoding == 'gzip' and gzip.decompress(body) == BODY
+    assert await payload.select('identity') == (BODY, None)
+
+
+@pytest.mark.asyncio
+async def test_the_plain_body_is_not_kept_next_to_a_gzip_variant():
+    payload = PrecompressedBody(BODY, LEVELS)
+
+    assert payload.nbytes == sum(len(variant) for variant in payload.variants.values())
+    assert payload.nbytes < len(BODY)
+
+
+@pytest.mark.asyncio
+async def test_bodies_under_the_minimum_size_are_kept_plain():
+    payload = PrecompressedBody(b'{"data": []}', LEVELS, minimum_size=1024)
+
+    assert payload.variants == {}
+    assert await payload.select('br') == (b'{"data": []}', None)
+
+
+@pytest.mark.asyncio
+async def test_without_a_gzip_variant_the_plain_body_is_kept():
+    payload = PrecompressedBody(BODY, {'br': 4})
+
+    assert await payload.select(None) == (BODY, None)
+    assert payload.nbytes == len(BODY) + len(payload.variants['br'])
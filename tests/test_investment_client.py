@@ -0,0 +1,58 @@
+import errno
+import os
+
+import pytest
+
+from config import config_obj
+from src.clients import investment_client
+
+SCHEMES = [
+    {"Scheme_Code": 100, "Scheme_Name": "Fund 0", "Net_Asset_Value": 10.0, "Scheme_Type": "Open Ended Schemes"},
+    {"Scheme_Code": 101, "Scheme_Name": "Fund 1", "Net_Asset_Value": 11.0, "Scheme_Type": "Open Ended Schemes"},
+]
+
+
+@pytest.fixture
+def record_mode(tmp_path, monkeypatch):
+    path = tmp_path / "snapshot.json.gz"
+    monkeypatch.setattr(config_obj, "RAPID_API_MODE", "record")
+    monkeypatch.setattr(config_obj, "RAPID_API_SNAPSHOT_PATH", str(path))
+
+    async def fetch_live(query):
+        return list(SCHEMES)
+
+    monkeypatch.setattr(investment_client, "fetch_data_from_rapid_api", fetch_live)
+    return path
+
+
+@pytest.mark.asyncio
+async def test_recorded_snapshot_serves_the_same_schemes(record_mode, monkeypatch):
+    assert await investment_client.get_openended_schemes() == SCHEMES
+
+    monkeypatch.setattr(config_obj, "RAPID_API_MODE", "snapshot")
+    assert await investment_client.get_openended_schemes() == SCHEMES
+    assert await investment_client.fetch_data_from_api({"Scheme_Code": 101}) == SCHEMES[1:]
+
+
+@pytest.mark.asyncio
+async def test_failed_recording_still_returns_the_live_response(record_mode, monkeypatch):
+    def disk_full(*args, **kwargs):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(investment_client.json, "dump", disk_full)
+    record_errors = investment_client.snapshot_state["record_errors"]
+
+    assert await investment_client.get_openended_schemes() == SCHEMES
+    assert investment_client.snapshot_state["record_errors"] == record_errors + 1
+    # neither the snapshot nor its temporary file is left behind
+    assert os.listdir(record_mode.parent) == []
+
+
+@pytest.mark.asyncio
+async def test_snapshot_schemes_are_not_kept_in_memory(record_mode, monkeypatch):
+    await investment_client.get_openended_schemes()
+    monkeypatch.setattr(config_obj, "RAPID_API_MODE", "snapshot")
+    await investment_client.get_openended_schemes()
+
+    assert investment_client.get_snapshot_stats()["schemes"] == len(SCHEMES)
+    assert not any(isinstance(value, list) for value in investment_client.snapshot_state.values())
@@ -0,0 +1,242 @@
+import httpx
+import pytest
+import pytest_asyncio
+
+from config import config_obj
+from server import app
+from src.compression import weaken_etag
+from src.models.db_engine import get_read_session, get_session
+from src.routes import investment_routes
+from src.services import catalog_service as catalog_module
+from src.services.catalog_service import catalog_service
+from tests.helpers import USER_ID
+
+SCHEMES = [
+    {"Scheme_Code": 100 + position, "Scheme_Name": f"Alpha Fund {position}", "Net_Asset_Value": 10.0 + position,
+     "Date": "17-Oct-2026", "Mutual_Fund_Family": "Alpha Mutual Fund"}
+    for position in range(3)
+]
+
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    async def get_openended_schemes():
+        return [dict(scheme) for scheme in SCHEMES]
+
+    monkeypatch.setattr(catalog_module, "get_openended_schemes", get_openended_schemes)
+    catalog_service.invalidate()
+    app.dependency_overrides[investment_routes.access_token_bearer] = lambda: {"user": {"user_id": USER_ID}}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test/mfb/investment") as client:
+        yield client
+    app.dependency_overrides.clear()
+    catalog_service.invalidate()
+
+
+# the portfolio routes on the test database
+@pytest_asyncio.fixture
+async def portfolio_client(client, session):
+    async def test_session():
+        yield session
+
+    app.dependency_overrides[get_session] = test_session
+    app.dependency_overrides[get_read_session] = test_session
+    return client
+
+
+async def add_holding(client, scheme_code: int):
+    # the create route is the bare prefix, without the base_url trailing slash
+    response = await client.post("http://test/mfb/investment", json={
+        "scheme_code": scheme_code, "units": 2.0, "scheme_name": f"Alpha Fund {scheme_code}", "nav": 10.0,
+        "date": "2026-10-17T00:00:00", "current_value": 20.0, "fund_family": "Alpha Mutual Fund",
+    })
+    assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", [
+    "/get-json-data-RapidAPI?fields=Scheme_Code,Nope",
+    "/get-json-data-RapidAPI?fields=Nope&limit=2",
+    "/get-json-data-RapidAPI/stream?fields=Nope",
+    "/search-schemes?q=alpha&fields=Nope",
+])
+async def test_unknown_fields_are_rejected(client, path):
+    response = await client.get(path)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: Nope"
+
+
+@pytest.mark.asyncio
+async def test_known_fields_are_projected(client):
+    response = await client.get("/get-json-data-RapidAPI?fields=Scheme_Code")
+
+    assert response.status_code == 200
+    assert response.json()["data"] == {"data": [{"Scheme_Code": code} for code in (100, 101, 102)]}
+
+
+PORTFOLIO_PATHS = ["/view-portfolio", "/get-an-investment/100", "/portfolio-summary"]
+# identity, so the ETag is the route's own
+PLAIN = {"Accept-Encoding": "identity"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", PORTFOLIO_PATHS)
+async def test_portfolio_responses_carry_the_summary_version_etag(portfolio_client, session, path):
+    await add_holding(portfolio_client, 100)
+    etag = await investment_routes.get_portfolio_etag(USER_ID, session)
+
+    response = await portfolio_client.get(path, headers=PLAIN)
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", PORTFOLIO_PATHS)
+async def test_a_matching_portfolio_etag_is_not_modified(portfolio_client, session, path):
+    await add_holding(portfolio_client, 100)
+    etag = await investment_routes.get_portfolio_etag(USER_ID, session)
+
+    for if_none_match in (etag, weaken_etag(etag), f'"stale", {etag}', "*"):
+        response = await portfolio_client.get(path, headers={**PLAIN, "If-None-Match": if_none_match})
+
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", PORTFOLIO_PATHS)
+async def test_a_write_changes_the_portfolio_etag(portfolio_client, session, path):
+    await add_holding(portfolio_client, 100)
+    etag = await investment_routes.get_portfolio_etag(USER_ID, session)
+    await add_holding(portfolio_client, 101)
+
+    response = await portfolio_client.get(path, headers={**PLAIN, "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == await investment_routes.get_portfolio_etag(USER_ID, session)
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_a_portfolio_without_a_summary_has_no_etag(portfolio_client):
+    response = await portfolio_client.get("/portfolio-summary", headers={**PLAIN, "If-None-Match": "*"})
+
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+
+
+CATALOG_PATHS = [
+    "/get-json-data-RapidAPI",
+    "/get-json-data-RapidAPI?limit=2",
+    "/get-json-data-RapidAPI?fields=Scheme_Code",
+    "/get-json-data-RapidAPI/stream",
+    "/search-schemes?q=alpha",
+    "/get-all-fund-families",
+    "/get-fund-family-open-funds?fund_family=Alpha%20Mutual%20Fund",
+]
+
+
+async def catalog_etag():
+    return investment_routes.get_catalog_etag(await catalog_service.get_catalog())
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", CATALOG_PATHS)
+async def test_catalog_responses_carry_the_catalog_version_etag(client, path):
+    response = await client.get(path, headers=PLAIN)
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == await catalog_etag()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", CATALOG_PATHS)
+async def test_a_matching_catalog_etag_is_not_modified(client, path):
+    etag = await catalog_etag()
+
+    for if_none_match in (etag, weaken_etag(etag), "*"):
+        response = await client.get(path, headers={**PLAIN, "If-None-Match": if_none_match})
+
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", CATALOG_PATHS)
+async def test_a_stale_catalog_etag_gets_the_full_response(client, path):
+    etag = await catalog_etag()
+    catalog_service.invalidate()
+    SCHEMES.append({"Scheme_Code": 200, "Scheme_Name": "Alpha Fund New", "Net_Asset_Value": 9.0,
+                    "Date": "17-Oct-2026", "Mutual_Fund_Family": "Alpha Mutual Fund"})
+    try:
+        response = await client.get(path, headers={**PLAIN, "If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] == await catalog_etag()
+        assert response.headers["ETag"] != etag
+    finally:
+        SCHEMES.pop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", [
+    # pre-compressed when the catalog is built
+    "/get-json-data-RapidAPI",
+    "/get-all-fund-families",
+    # compressed chunk by chunk by CompressionMiddleware
+    "/get-json-data-RapidAPI/stream",
+])
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+async def test_a_compressed_response_has_a_weak_etag_that_still_matches(client, monkeypatch, path, encoding):
+    monkeypatch.setattr(config_obj, "COMPRESSION_MINIMUM_SIZE", 0)
+    etag = await catalog_etag()
+
+    response = await client.get(path, headers={"Accept-Encoding": encoding})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == encoding
+    assert response.headers["ETag"] == weaken_etag(etag)
+
+    # clients send the weak tag back, it matches the strong one the route computes
+    response = await client.get(path, headers={"Accept-Encoding": encoding, "If-None-Match": weaken_etag(etag)})
+    assert response.status_code == 304
+
+
+def csv_upload(rows: int, content: bytes = None) -> dict:
+    if content is None:
+        content = b'scheme_code,units,scheme_name,nav,date,current_value,fund_family\n' + b''.join(
+            b'%d,2.0,Alpha Fund %d,10.0,2026-10-17T00:00:00,20.0,Alpha Mutual Fund\n' % (code, code)
+            for code in range(rows)
+        )
+    return {"file": ("investments.csv", content, "text/csv")}
+
+
+@pytest.mark.asyncio
+async def test_a_csv_upload_is_imported(portfolio_client):
+    response = await portfolio_client.post("/bulk-import/csv", files=csv_upload(3))
+
+    assert response.status_code == 200
+    assert response.json()["data"]["created"] == 3
+
+
+@pytest.mark.asyncio
+async def test_a_csv_upload_over_the_row_limit_is_rejected(portfolio_client, monkeypatch):
+    monkeypatch.setattr(config_obj, "BULK_IMPORT_MAX_ROWS", 5)
+
+    assert (await portfolio_client.post("/bulk-import/csv", files=csv_upload(5))).status_code == 200
+    response = await portfolio_client.post("/bulk-import/csv", files=csv_upload(6))
+
+    assert response.status_code == 413
+    assert response.json()["detail"] == "At most 5 rows can be imported at once"
+
+
+@pytest.mark.asyncio
+async def test_an_undecodable_csv_upload_is_rejected(portfolio_client):
+    response = await portfolio_client.post("/bulk-import/csv", files=csv_upload(0, b'scheme_code\n\xff\xfe\n'))
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid CSV file"
@@ -0,0 +1,200 @@
+import io
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlmodel import select
+
+from config import config_obj
+from src.models.db_models import Investment, SchemeNav
+from src.services.investment_service import InvestmentService
+from src.services.portfolio_service import portfolio_summary_service
+from tests.helpers import USER_ID, add_investment
+
+investment_service = InvestmentService()
+
+NAV_DATE = datetime(2026, 10, 1)
+NEXT_NAV_DATE = datetime(2026, 10, 2)
+
+
+def nav_params(scheme_code: int, nav: float, nav_date: datetime = NEXT_NAV_DATE) -> dict:
+    return {'b_scheme_code': scheme_code, 'b_nav': nav, 'b_date': nav_date}
+
+
+# the stored summary without updated_at, to compare it with one rebuilt from the investments
+async def summary_totals(session) -> dict:
+    summary = await portfolio_summary_service.get_summary(USER_ID, session)
+    return {key: value for key, value in summary.items() if key != 'updated_at'}
+
+
+async def rebuilt_totals(session) -> dict:
+    summaries = await portfolio_summary_service.rebuild_summaries([USER_ID], session)
+    summary = portfolio_summary_service.to_view(summaries[USER_ID])
+    await session.rollback()
+    return {key: value for key, value in summary.items() if key != 'updated_at'}
+
+
+async def fail(*args, **kwargs):
+    raise RuntimeError('summary write failed')
+
+
+@pytest_asyncio.fixture
+async def two_holdings(session):
+    add_investment(session, 1, units=2, nav=10, current_value=20, fund_family='Alpha')
+    add_investment(session, 2, units=4, nav=5, current_value=20, fund_family='Beta')
+    session.add_all([SchemeNav(scheme_code=1, nav=10, date=NAV_DATE), SchemeNav(scheme_code=2, nav=5, date=NAV_DATE)])
+    await session.flush()
+    await portfolio_summary_service.rebuild_summaries([USER_ID], session)
+    await session.commit()
+    return session
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('mode', ['normalized', 'bulk', 'orm'])
+async def test_a_failed_run_is_retried_for_every_scheme(two_holdings, monkeypatch, mode):
+    session = two_holdings
+    # one statement per batch, none of them may be committed before the summaries are written
+    monkeypatch.setattr(config_obj, 'NAV_UPDATE_BATCH_SIZE', 1)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(portfolio_summary_service, 'apply_nav_changes', fail)
+        patch.setattr(portfolio_summary_service, 'rebuild_summaries_for_schemes', fail)
+        with pytest.raises(RuntimeError):
+            await investment_service.apply_nav_updates([nav_params(1, 12.0), nav_params(2, 6.0)], session, mode)
+
+    result = await investment_service.apply_nav_updates([nav_params(1, 12.0), nav_params(2, 6.0)], session, mode)
+
+    assert (result['stats']['schemes_changed'], result['stats']['schemes_skipped']) == (2, 0)
+    totals = await summary_totals(session)
+    assert totals['current_value'] == 2 * 12.0 + 4 * 6.0
+    assert totals == await rebuilt_totals(session)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('mode', ['bulk', 'orm'])
+async def test_a_failed_run_leaves_the_holdings_untouched(two_holdings, monkeypatch, mode):
+    session = two_holdings
+    monkeypatch.setattr(config_obj, 'NAV_UPDATE_BATCH_SIZE', 1)
+    before = await summary_totals(session)
+
+    monkeypatch.setattr(portfolio_summary_service, 'rebuild_summaries_for_schemes', fail)
+    with pytest.raises(RuntimeError):
+        await investment_service.apply_nav_updates([nav_params(1, 12.0), nav_params(2, 6.0)], session, mode)
+
+    result = await session.exec(select(Investment.scheme_code, Investment.nav, Investment.current_value))
+    assert sorted(result.all()) == [(1, 10.0, 20.0), (2, 5.0, 20.0)]
+    result = await session.exec(select(SchemeNav.scheme_code, SchemeNav.nav))
+    assert sorted(result.all()) == [(1, 10.0), (2, 5.0)]
+    assert await summary_totals(session) == before
+
+
+@pytest.mark.parametrize('previous_nav, nav, same', [
+    (10.0, 10.0, True),
+    # single precision FLOAT round trips
+    (10.12339973449707, 10.1234, True),
+    (45678.125, 45678.1234, True),
+    (10.0, 10.00004, True),
+    (10.0, 10.0001, False),
+    (1234.5678, 1234.5688, False),
+    (45678.1234, 45678.1334, False),
+])
+def test_navs_are_compared_with_a_tolerance(previous_nav, nav, same):
+    assert InvestmentService._same_nav(previous_nav, nav) is same
+
+
+@pytest.mark.parametrize('previous, params, unchanged', [
+    (None, nav_params(1, 10.0, NAV_DATE), False),
+    ((10.0, NAV_DATE), nav_params(1, 10.00001, NAV_DATE), True),
+    # the database may hand back an aware datetime for the naive one that was written
+    ((10.0, NAV_DATE.replace(tzinfo=timezone.utc)), nav_params(1, 10.0, NAV_DATE), True),
+    ((10.0, NAV_DATE), nav_params(1, 10.0, NEXT_NAV_DATE), False),
+    ((10.0, NAV_DATE), nav_params(1, 10.5, NAV_DATE), False),
+])
+def test_a_scheme_is_unchanged_only_with_the_same_date_and_nav(previous, params, unchanged):
+    assert InvestmentService._is_unchanged(previous, params) is unchanged
+
+
+async def scheme_navs(session) -> dict:
+    result = await session.exec(select(SchemeNav.scheme_code, SchemeNav.nav, SchemeNav.date))
+    return {scheme_code: (nav, date) for scheme_code, nav, date in result.all()}
+
+
+@pytest.mark.asyncio
+async def test_an_unchanged_snapshot_writes_nothing(two_holdings):
+    session = two_holdings
+    version = await portfolio_summary_service.get_version(USER_ID, session)
+
+    result = await investment_service.apply_nav_updates(
+        [nav_params(1, 10.0, NAV_DATE), nav_params(2, 5.00001, NAV_DATE)], session
+    )
+
+    stats = result['stats']
+    assert (stats['schemes_total'], stats['schemes_changed'], stats['schemes_skipped']) == (2, 0, 2)
+    assert (stats['schemes_written'], stats['summaries_updated'], stats['batches']) == (0, 0, 0)
+    assert await portfolio_summary_service.get_version(USER_ID, session) == version
+
+
+@pytest.mark.asyncio
+async def test_a_new_date_is_written_without_revaluing(two_holdings):
+    session = two_holdings
+    before = await summary_totals(session)
+    version = await portfolio_summary_service.get_version(USER_ID, session)
+
+    result = await investment_service.apply_nav_updates([nav_params(1, 10.0), nav_params(2, 5.0, NAV_DATE)], session)
+
+    stats = result['stats']
+    assert (stats['schemes_changed'], stats['schemes_skipped'], stats['schemes_written']) == (1, 1, 1)
+    assert (await scheme_navs(session))[1] == (10.0, NEXT_NAV_DATE)
+    # the totals stay, the version moves so cached portfolio responses are revalidated
+    assert await summary_totals(session) == before
+    assert await portfolio_summary_service.get_version(USER_ID, session) == version + 1
+
+
+@pytest.mark.asyncio
+async def test_a_run_counts_changed_skipped_and_new_schemes(two_holdings):
+    session = two_holdings
+    add_investment(session, 3, units=1, nav=7, current_value=7, fund_family='Gamma')
+    await session.commit()
+
+    result = await investment_service.apply_nav_updates(
+        [nav_params(1, 10.0, NAV_DATE), nav_params(2, 6.0), nav_params(3, 7.5)], session
+    )
+
+    stats = result['stats']
+    assert (stats['schemes_total'], stats['schemes_changed'], stats['schemes_skipped']) == (3, 2, 1)
+    assert stats['schemes_written'] == 2
+    assert await scheme_navs(session) == {1: (10.0, NAV_DATE), 2: (6.0, NEXT_NAV_DATE), 3: (7.5, NEXT_NAV_DATE)}
+
+
+CSV_HEADER = b'scheme_code,units,scheme_name,nav,date,current_value,fund_family\n'
+
+
+def csv_rows(count: int) -> list:
+    return [b'%d,1.5,Scheme %d,10.0,2026-10-17T00:00:00,15.0,Alpha Mutual Fund\n' % (code, code)
+            for code in range(count)]
+
+
+def test_csv_rows_are_read_up_to_one_past_the_limit():
+    lines = [CSV_HEADER] + csv_rows(100)
+    read = []
+
+    def upload():
+        for line in lines:
+            read.append(line)
+            yield line
+
+    rows = investment_service.read_investment_csv(upload(), max_rows=10)
+
+    assert len(rows) == 11
+    assert rows[0]['scheme_name'] == 'Scheme 0'
+    # the header and the 11 rows, the rest of the file is never read
+    assert len(read) == 12
+
+
+def test_csv_rows_keep_quoted_newlines_and_skip_the_bom():
+    content = b'\xef\xbb\xbf' + CSV_HEADER + b'1,1.5,"Scheme\nOne",10.0,2026-10-17T00:00:00,15.0,Alpha\n'
+
+    rows = investment_service.read_investment_csv(io.BytesIO(content), max_rows=10)
+
+    assert [row['scheme_name'] for row in rows] == ['Scheme\nOne']
+    assert rows[0]['scheme_code'] == '1'
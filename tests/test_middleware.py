@@ -0,0 +1,138 @@
+import gzip
+import zlib
+
+import brotli
+import pytest
+
+from src.middleware import CompressionMiddleware
+
+MINIMUM_SIZE = 1024
+LARGE_BODY = b'{"data": [' + b', '.join(b'{"Scheme_Code": %d}' % code for code in range(200)) + b']}'
+LINES = [b'{"Scheme_Code": %d, "Scheme_Name": "Fund %d"}\n' % (code, code) for code in range(300)]
+
+DECODERS = {'gzip': gzip.decompress, 'br': brotli.decompress}
+
+
+def plain_app(body: bytes, status: int = 200, headers: list = None):
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers or [
+            (b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()),
+            (b'etag', b'"v1"'),
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    return app
+
+
+# sends the lines in chunks of `per_chunk` and an empty last chunk, like StreamingResponse
+def ndjson_app(per_chunk: int):
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'application/x-ndjson'), (b'etag', b'"v1"'),
+        ]})
+        for start in range(0, len(LINES), per_chunk):
+            await send({'type': 'http.response.body', 'body': b''.join(LINES[start:start + per_chunk]),
+                        'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    return app
+
+
+# (start message headers, body chunks) the client receives
+async def call(app, accept_encoding: str = None) -> tuple[dict, list]:
+    headers = [(b'accept-encoding', accept_encoding.encode())] if accept_encoding is not None else []
+    scope = {'type': 'http', 'method': 'GET', 'path': '/', 'headers': headers}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    await CompressionMiddleware(app, minimum_size=MINIMUM_SIZE)(scope, receive, send)
+    start, chunks = messages[0], messages[1:]
+    return {name.decode(): value.decode() for name, value in start['headers']}, [chunk['body'] for chunk in chunks]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ('gzip, deflate, br', 'br'),
+    ('gzip', 'gzip'),
+    ('br;q=0, gzip', 'gzip'),
+])
+async def test_the_preferred_accepted_coding_is_used(accept_encoding, expected):
+    headers, chunks = await call(plain_app(LARGE_BODY), accept_encoding)
+
+    assert headers['content-encoding'] == expected
+    assert headers['vary'] == 'Accept-Encoding'
+    assert headers['etag'] == 'W/"v1"'
+    assert headers['content-length'] == str(len(chunks[0]))
+    assert DECODERS[expected](chunks[0]) == LARGE_BODY
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("accept_encoding", [None, 'identity', 'deflate', '*;q=0'])
+async def test_clients_without_a_supported_coding_get_the_plain_body(accept_encoding):
+    headers, chunks = await call(plain_app(LARGE_BODY), accept_encoding)
+
+    assert 'content-encoding' not in headers
+    # another client would get a compressed body
+    assert headers['vary'] == 'Accept-Encoding'
+    assert headers['etag'] == '"v1"'
+    assert chunks == [LARGE_BODY]
+
+
+@pytest.mark.asyncio
+async def test_bodies_under_the_minimum_size_are_sent_plain():
+    body = LARGE_BODY[:MINIMUM_SIZE - 1]
+    headers, chunks = await call(plain_app(body), 'br')
+
+    assert 'content-encoding' not in headers
+    assert headers['vary'] == 'Accept-Encoding'
+    assert headers['etag'] == '"v1"'
+    assert chunks == [body]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status, headers", [
+    (200, [(b'content-type', b'application/json'), (b'content-encoding', b'gzip')]),
+    (200, [(b'content-type', b'image/png')]),
+    (304, [(b'etag', b'"v1"')]),
+])
+async def test_encoded_binary_and_not_modified_responses_pass_through(status, headers):
+    sent_headers, chunks = await call(plain_app(LARGE_BODY, status, headers), 'br')
+
+    assert sent_headers == {name.decode(): value.decode() for name, value in headers}
+    assert chunks == [LARGE_BODY]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ['gzip', 'br'])
+async def test_streamed_chunks_decode_as_they_arrive(encoding):
+    per_chunk = 50
+    headers, chunks = await call(ndjson_app(per_chunk), encoding)
+
+    assert headers['content-encoding'] == encoding
+    assert headers['etag'] == 'W/"v1"'
+    assert 'content-length' not in headers
+
+    # every chunk is flushed: what has arrived decodes to exactly the lines sent so far
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS) if encoding == 'gzip' else brotli.Decompressor()
+    decode = decoder.decompress if encoding == 'gzip' else decoder.process
+    received = b''
+    for position, chunk in enumerate(chunks[:-1]):
+        received += decode(chunk)
+        assert received == b''.join(LINES[:(position + 1) * per_chunk])
+
+    assert DECODERS[encoding](b''.join(chunks)) == b''.join(LINES)
+
+
+@pytest.mark.asyncio
+async def test_a_stream_under_the_minimum_size_is_still_compressed():
+    # the size is unknown when the first chunk goes out
+    headers, chunks = await call(ndjson_app(1), 'gzip')
+
+    assert headers['content-encoding'] == 'gzip'
+    assert len(LINES[0]) < MINIMUM_SIZE
+    assert gzip.decompress(b''.join(chunks)) == b''.join(LINES)
@@ -0,0 +1,149 @@
+from datetime import datetime
+
+import pytest
+
+from src.models.db_models import SchemeNav
+from src.services.investment_service import InvestmentService
+from src.services.portfolio_service import portfolio_summary_service
+from tests.helpers import USER_ID, add_investment, get_summary_row
+
+
+@pytest.mark.asyncio
+async def test_first_write_rebuilds_the_summary_from_flushed_investments(session):
+    add_investment(session, 1, units=2, nav=10, current_value=20, fund_family='Alpha')
+    add_investment(session, 2, units=1, nav=5, current_value=6, fund_family='Beta')
+    await session.flush()
+
+    await portfolio_summary_service.apply_deltas({USER_ID: {'Alpha': [20.0, 20.0, 1]}}, session)
+    await session.commit()
+
+    summary = await get_summary_row(session)
+    # rebuilt from the investments, the delta is not added on top of them a second time
+    assert summary.invested_value == 25.0
+    assert summary.current_value == 26.0
+    assert summary.holdings == 2
+    assert summary.family_breakdown['Alpha'] == {'invested_value': 20.0, 'current_value': 20.0, 'holdings': 1}
+
+
+@pytest.mark.asyncio
+async def test_deltas_add_to_families_and_re_sum_the_totals(session):
+    add_investment(session, 1, units=2, nav=10, current_value=20, fund_family='Alpha')
+    await session.flush()
+    await portfolio_summary_service.rebuild_summaries([USER_ID], session)
+    version = (await get_summary_row(session)).version
+
+    await portfolio_summary_service.apply_deltas(
+        {USER_ID: {'Alpha': [0.0, 1.23456, 0], 'Beta': [10.0, 12.0, 1]}}, session
+    )
+
+    summary = await get_summary_row(session)
+    assert summary.family_breakdown == {
+        'Alpha': {'invested_value': 20.0, 'current_value': 21.2346, 'holdings': 1},
+        'Beta': {'invested_value': 10.0, 'current_value': 12.0, 'holdings': 1},
+    }
+    assert summary.invested_value == 30.0
+    assert summary.current_value == 33.2346
+    assert summary.holdings == 2
+    assert summary.version == version + 1
+
+
+@pytest.mark.asyncio
+async def test_a_family_without_holdings_is_dropped(session):
+    add_investment(session, 1, units=2, nav=10, current_value=20, fund_family='Alpha')
+    add_investment(session, 2, units=1, nav=5, current_value=5, fund_family='Beta')
+    await session.flush()
+    await portfolio_summary_service.rebuild_summaries([USER_ID], session)
+
+    await portfolio_summary_service.apply_investment_change(USER_ID, session, old=('Beta', 5.0, 5.0))
+
+    summary = await get_summary_row(session)
+    assert list(summary.family_breakdown) == ['Alpha']
+    assert (summary.invested_value, summary.current_value, summary.holdings) == (20.0, 20.0, 1)
+
+
+@pytest.mark.asyncio
+async def test_moving_a_holding_between_families(session):
+    add_investment(session, 1, units=2, nav=10, current_value=20, fund_family='Alpha')
+    await session.flush()
+    await portfolio_summary_service.rebuild_summaries([USER_ID], session)
+
+    await portfolio_summary_service.apply_investment_change(
+        USER_ID, session, old=('Alpha', 20.0, 20.0), new=('Beta', 30.0, 33.0)
+    )
+
+    summary = await get_summary_row(session)
+    assert summary.family_breakdown == {'Beta': {'invested_value': 30.0, 'current_value': 33.0, 'holdings': 1}}
+    assert (summary.invested_value, summary.current_value, summary.holdings) == (30.0, 33.0, 1)
+
+
+@pytest.mark.asyncio
+async def test_nav_changes_revalue_holdings_from_the_previous_nav(session):
+    add_investment(session, 1, units=2, nav=10, current_value=20, fund_family='Alpha')
+    add_investment(session, 2, units=4, nav=5, current_value=18, fund_family='Alpha')
+    session.add(SchemeNav(scheme_code=1, nav=11, date=datetime(2026, 10, 1)))
+    await session.flush()
+    await portfolio_summary_service.rebuild_summaries([USER_ID], session)
+    assert (await get_summary_row(session)).current_value == 40.0
+
+    # scheme 1 had a NAV of 11, scheme 2 none, so it was valued at its stored current_value
+    await portfolio_summary_service.apply_nav_changes({1: (11.0, 12.5), 2: (None, 6.0)}, session)
+
+    summary = await get_summary_row(session)
+    assert summary.family_breakdown['Alpha']['current_value'] == 2 * 12.5 + 4 * 6.0
+    assert summary.family_breakdown['Alpha']['invested_value'] == 40.0
+    assert summary.holdings == 2
+
+
+@pytest.mark.asyncio
+async def test_a_date_only_nav_change_only_bumps_the_version(session):
+    add_investment(session, 1, units=2, nav=10, current_value=20, fund_family='Alpha')
+    await session.flush()
+    await portfolio_summary_service.rebuild_summaries([USER_ID], session)
+    before = await get_summary_row(session)
+    current_value, version = before.current_value, before.version
+
+    await portfolio_summary_service.apply_nav_changes({1: (10.0, 10.0)}, session)
+
+    summary = await get_summary_row(session)
+    assert summary.current_value == current_value
+    assert summary.version == version + 1
+
+
+@pytest.mark.asyncio
+async def test_creating_a_row_another_transaction_inserted_keeps_the_transaction_usable(session):
+    await portfolio_summary_service.create_summary_rows([USER_ID], session)
+    await session.commit()
+
+    assert await portfolio_summary_service.create_summary_rows([USER_ID], session) == []
+    add_investment(session, 1, units=2, nav=10, current_value=20, fund_family='Alpha')
+    await session.flush()
+    await portfolio_summary_service.apply_deltas({USER_ID: {'Alpha': [20.0, 20.0, 1]}}, session)
+    await session.commit()
+
+    summary = await get_summary_row(session)
+    assert (summary.invested_value, summary.current_value, summary.holdings) == (20.0, 20.0, 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('mode', ['normalized', 'bulk', 'orm'])
+async def test_summaries_match_a_rebuild_after_a_nav_refresh(session, mode):
+    # scheme 1 already has a scheme_navs row, scheme 2 gets its first one from the refresh
+    add_investment(session, 1, units=2, nav=10, current_value=20, fund_family='Alpha')
+    add_investment(session, 2, units=4, nav=5, current_value=20, fund_family='Beta')
+    session.add(SchemeNav(scheme_code=1, nav=10, date=datetime(2026, 10, 1)))
+    await session.flush()
+    await portfolio_summary_service.rebuild_summaries([USER_ID], session)
+    await session.commit()
+
+    await InvestmentService().apply_nav_updates([
+        {'b_scheme_code': 1, 'b_nav': 12.0, 'b_date': datetime(2026, 10, 2)},
+        {'b_scheme_code': 2, 'b_nav': 6.0, 'b_date': datetime(2026, 10, 2)},
+    ], session, mode)
+
+    summary = await portfolio_summary_service.get_summary(USER_ID, session)
+    assert (summary['invested_value'], summary['current_value'], summary['gain']) == (40.0, 48.0, 8.0)
+
+    rebuilt = await portfolio_summary_service.rebuild_summaries([USER_ID], session)
+    rebuilt = portfolio_summary_service.to_view(rebuilt[USER_ID])
+    assert summary['fund_families'] == rebuilt['fund_families']
+    assert (summary['invested_value'], summary['current_value']) == (rebuilt['invested_value'], rebuilt['current_value'])
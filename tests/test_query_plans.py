@@ -0,0 +1,44 @@
+"""The hot lookup queries are answered from an index instead of a table scan, checked with SQLite's EXPLAIN QUERY PLAN."""
+import pytest
+from sqlalchemy import create_engine, desc, select, text
+
+from src.models.db_models import Base, Investment, User
+
+
+@pytest.fixture(scope="module")
+def connection():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
+
+
+# the plan's first row is the driving table, joined tables follow
+def driving_plan(connection, statement) -> str:
+    compiled = statement.compile(connection, compile_kwargs={"literal_binds": True})
+    return [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))][0]
+
+
+def test_get_user_by_email_uses_email_index(connection):
+    statement = select(User).where(User.email == "user@example.com")
+    assert "ix_users_email" in driving_plan(connection, statement)
+
+
+def test_get_investment_by_user_id_and_scheme_code_uses_composite_index(connection):
+    statement = (
+        select(Investment)
+        .where(Investment.user_id == "user-id", Investment.scheme_code == 100001)
+        .order_by(desc(Investment.created_at))
+    )
+    assert "ix_investments_user_id_scheme_code" in driving_plan(connection, statement)
+
+
+def test_get_investments_by_user_id_uses_user_created_at_index(connection):
+    statement = select(Investment).where(Investment.user_id == "user-id").order_by(desc(Investment.created_at))
+    assert "ix_investments_user_id_created_at" in driving_plan(connection, statement)
+
+
+def test_nav_refresh_update_by_scheme_code_uses_scheme_code_index(connection):
+    statement = select(Investment.investment_id).where(Investment.scheme_code == 100001)
+    assert "ix_investments_scheme_code" in driving_plan(connection, statement)
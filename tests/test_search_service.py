@@ -0,0 +1,92 @@
+import pytest
+
+from benchmarks.synthetic import make_scheme_universe
+from src.services.search_service import (EXACT_NAME_SCORE, FAMILY_SCORE, PREFIX_NAME_SCORE, SchemeSearchIndex,
+                                         tokenize)
+
+SCHEMES = [
+    {"Scheme_Code": 1, "Scheme_Name": "Alpha Liquid Fund - Direct Growth", "Mutual_Fund_Family": "Alpha Mutual Fund"},
+    {"Scheme_Code": 2, "Scheme_Name": "Alpha Liquidity Plus Fund", "Mutual_Fund_Family": "Alpha Mutual Fund"},
+    {"Scheme_Code": 3, "Scheme_Name": "Beta Liquid Fund", "Mutual_Fund_Family": "Liquidus Mutual Fund"},
+    {"Scheme_Code": 4, "Scheme_Name": "Gamma Gilt Fund", "Mutual_Fund_Family": "Liquidus Mutual Fund"},
+    {"Scheme_Code": 5, "Scheme_Name": "Beta Gilt Fund"},
+]
+
+
+def codes(schemes):
+    return [scheme["Scheme_Code"] for scheme in schemes]
+
+
+# scores every scheme, the index has to agree with this on any query
+def reference_search(schemes, query, limit):
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens or limit <= 0:
+        return []
+    ranked = []
+    for scheme in schemes:
+        names = set(tokenize(scheme.get("Scheme_Name")))
+        families = set(tokenize(scheme.get("Mutual_Fund_Family")))
+        score = 0
+        for token in tokens:
+            if token in names:
+                token_score = EXACT_NAME_SCORE
+            elif any(name.startswith(token) for name in names):
+                token_score = PREFIX_NAME_SCORE
+            elif any(family.startswith(token) for family in families):
+                token_score = FAMILY_SCORE
+            else:
+                break
+            score += token_score
+        else:
+            ranked.append((-score, len(scheme.get("Scheme_Name") or ""), scheme["Scheme_Code"]))
+    return [code for _, _, code in sorted(ranked)[:limit]]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SchemeSearchIndex(SCHEMES)
+
+
+def test_exact_name_tokens_rank_above_prefixes_and_families(index):
+    # Liquid in the name, Liquidity is only a prefix match, Liquidus only the family
+    assert codes(index.search("liquid")) == [3, 1, 2, 4]
+
+
+def test_equal_scores_go_to_the_shorter_name(index):
+    assert codes(index.search("gilt")) == [5, 4]
+
+
+def test_partially_typed_tokens_match_as_prefixes(index):
+    assert codes(index.search("alp liq")) == [2, 1]
+    assert codes(index.search("gam")) == [4]
+
+
+def test_every_token_has_to_match(index):
+    assert codes(index.search("beta gilt")) == [5]
+    assert index.search("beta alpha") == []
+
+
+def test_results_stop_at_the_limit(index):
+    assert codes(index.search("fund", limit=2)) == [5, 4]
+    assert index.search("fund", limit=0) == []
+
+
+@pytest.mark.parametrize("query", ["", "   ", "--- !!", "zzz", "alpha zzz", None])
+def test_empty_and_unknown_queries_find_nothing(index, query):
+    assert index.search(query) == []
+
+
+@pytest.fixture(scope="module")
+def universe():
+    return make_scheme_universe(3000)
+
+
+@pytest.mark.parametrize("query", [
+    "f", "fund", "mutual fund", "direct growth", "fund regular", "growth plan", "m", "hdfc", "hdfc mid",
+    "tax saver direct", "nifty 50 index", "quarterly regular", "ba qua mutual", "lic ppfas", "samco invesco",
+])
+@pytest.mark.parametrize("limit", [1, 10, 50])
+def test_early_termination_ranks_like_scoring_every_scheme(universe, query, limit):
+    index = SchemeSearchIndex(universe)
+
+    assert codes(index.search(query, limit)) == reference_search(universe, query, limit)